@@ -0,0 +1,54 @@
+import asyncio
+import json
+from typing import Annotated
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
+from app.api.deps import get_current_user_from_token
+from app.api.sensory_gym import run_together
+from app.models.user import User
+from ml.magic_canvas import MagicCanvasSession
+
+router = APIRouter()
+
+
+async def receive_frames(websocket: WebSocket, frames: asyncio.Queue):
+    # Only the newest frame waits; older ones are dropped if tracking falls behind
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        frame = message.get("bytes")
+        if frame:
+            if frames.full():
+                frames.get_nowait()
+            frames.put_nowait(frame)
+
+
+async def draw(websocket: WebSocket, session: MagicCanvasSession, frames: asyncio.Queue):
+    while True:
+        update = await session.process(await frames.get())
+        await websocket.send_text(json.dumps(update, separators=(",", ":")))
+
+
+@router.websocket("/ws/magic-canvas")
+async def magic_canvas_endpoint(
+    websocket: WebSocket,
+    current_user: Annotated[User, Depends(get_current_user_from_token)]
+):
+    """
+    Server-side Magic Canvas. The browser sends webcam frames as binary
+    messages and gets back one JSON update per tracked frame: the gesture,
+    the cursor and the stroke segments that changed (see ml/magic_canvas.py).
+    Each connection is its own canvas with its own tracker.
+    """
+    await websocket.accept()
+    session = MagicCanvasSession()
+    frames = asyncio.Queue(maxsize=1)
+    try:
+        await session.start()
+        await run_together(receive_frames(websocket, frames), draw(websocket, session, frames))
+    except WebSocketDisconnect:
+        print(f"User {current_user.id} disconnected from the Magic Canvas.")
+    except Exception as e:
+        print(f"Error in Magic Canvas session for user {current_user.id}: {e}")
+    finally:
+        await session.close()
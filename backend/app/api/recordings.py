@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Annotated, List, Optional
+
+from app.api.deps import get_current_user
+from app.models.user import User
+from app.models.schemas.recordings import LandmarkSeries, RecordingSummary
+from app.services.landmark_recorder import list_recordings, lttb, open_recording
+
+router = APIRouter(prefix="/recordings", tags=["Recordings"])
+
+def _summary(recording) -> RecordingSummary:
+    return RecordingSummary(
+        session_id=recording.meta["session_id"],
+        started_at=recording.meta["started_at"],
+        duration=recording.duration,
+        frames=recording.frames,
+        landmarks=recording.landmarks,
+        fields=recording.fields,
+    )
+
+@router.get("/", response_model=List[RecordingSummary])
+def get_recordings(current_user: Annotated[User, Depends(get_current_user)]):
+    """
+    Lists the current user's recorded Sensory Gym sessions, oldest first.
+    """
+    return [_summary(r) for r in list_recordings(current_user.id)]
+
+@router.get("/{session_id}/series", response_model=LandmarkSeries)
+def get_landmark_series(
+    session_id: str,
+    current_user: Annotated[User, Depends(get_current_user)],
+    landmark: int = 8,
+    field: str = Query("y", pattern="^[xyz]$"),
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    points: int = Query(500, ge=3, le=5000),
+):
+    """
+    One landmark coordinate over time, for charting. `start` and `end` are
+    seconds from the start of the session; the range is downsampled to at
+    most `points` samples with LTTB, which keeps peaks and turns visible.
+    Frames without a tracked hand are left out.
+    """
+    recording = open_recording(current_user.id, session_id)
+    if recording is None:
+        raise HTTPException(status_code=404, detail="Recording not found")
+    if landmark not in recording.landmarks or field not in recording.fields:
+        raise HTTPException(status_code=400, detail="This landmark or field was not recorded")
+
+    t, values = recording.series(landmark, field, start, end)
+    keep = lttb(t, values, points)
+    return LandmarkSeries(session_id=session_id, landmark=landmark, field=field,
+                          t=t[keep].tolist(), values=values[keep].tolist())
@@ -1,45 +1,341 @@
 import asyncio
+import time
+from collections import deque
 import aiohttp
 from typing import Annotated
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
 from app.api.deps import get_current_user_from_token # <-- IMPORT THE NEW FUNCTION
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Histogram, registry
 from app.models.user import User
+from app.services.landmark_recorder import start_recording
+from app.services.tracker_fleet import fleet
+from app.services.tracker_mux import CONNECTION_LOST, MuxStream
+from app.services.tracker_shm import ShmTrackerClient
 
 router = APIRouter()
 
-# (The ConnectionManager class remains exactly the same)
+# --- Relay Configuration ---
+# Webcam frames flow browser -> backend -> tracker and landmarks flow back.
+# A user's tracker session follows one camera: the first of their
+# connections to send a frame is the session's source until it closes, and
+# frames from their other connections are ignored (they only receive), so
+# two cameras never alternate inside one tracking state.
+# Frames wait in a small per-user queue; when the tracker falls behind the
+# oldest one is dropped so latency and memory stay flat. Results fan out to
+# every connection the user has open (a second tab or device), each through
+# its own bounded send queue and writer, so a slow browser only ever delays
+# itself.
+FRAME_QUEUE_SIZE = 2
+
+# What a connection does when its send queue is full:
+DROP_OLDEST = "drop_oldest"  # drop the oldest queued result
+LATEST = "latest"            # discard everything queued, keep only the newest
+DISCONNECT = "disconnect"    # close the connection (1008)
+OVERFLOW_POLICIES = (DROP_OLDEST, LATEST, DISCONNECT)
+TOO_SLOW = 1008
+
+DROPPED_FRAMES = registry.register(Counter(
+    "sensory_gym_dropped_frames_total", "Webcam frames dropped because the tracker fell behind."))
+IGNORED_FRAMES = registry.register(Counter(
+    "sensory_gym_ignored_frames_total", "Webcam frames ignored because another connection is the user's source."))
+DROPPED_RESULTS = registry.register(Counter(
+    "sensory_gym_dropped_results_total", "Tracker results dropped because a browser fell behind."))
+SLOW_DISCONNECTS = registry.register(Counter(
+    "sensory_gym_slow_disconnects_total", "Connections closed by the disconnect overflow policy."))
+SEND_SECONDS = registry.register(Histogram(
+    "sensory_gym_send_seconds", "Time from queueing a result to handing it to the browser socket.")).labels()
+
+
+class ClientConnection:
+    """
+    One browser socket of a user. Results are queued by `offer`, which never
+    waits, and sent by `write`, which runs alongside the socket's receiver.
+    """
+
+    def __init__(self, websocket: WebSocket, overflow: str = DROP_OLDEST,
+                 queue_size: int = settings.SENSORY_GYM_SEND_QUEUE_SIZE):
+        self.websocket = websocket
+        self.overflow = overflow
+        self.queue_size = queue_size
+        self.queue = deque()
+        self.overflowed = False
+        self._ready = asyncio.Event()
+
+    def offer(self, message: str | bytes):
+        if len(self.queue) >= self.queue_size:
+            if self.overflow == DISCONNECT:
+                if not self.overflowed:
+                    self.overflowed = True
+                    SLOW_DISCONNECTS.inc()
+                    self._ready.set()
+                return
+            if self.overflow == LATEST:
+                DROPPED_RESULTS.inc(len(self.queue))
+                self.queue.clear()
+            else:
+                DROPPED_RESULTS.inc()
+                self.queue.popleft()
+        self.queue.append((message, time.perf_counter()))
+        self._ready.set()
+
+    async def write(self):
+        """Sends queued results until the connection overflows under DISCONNECT."""
+        while not self.overflowed:
+            if not self.queue:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            message, queued_at = self.queue.popleft()
+            if isinstance(message, bytes):
+                await self.websocket.send_bytes(message)
+            else:
+                await self.websocket.send_text(message)
+            SEND_SECONDS.observe(time.perf_counter() - queued_at)
+
+
+class UserRelay:
+    """
+    The tracker session shared by all of one user's connections. The first
+    connection's tracker options (e.g. ?format=) apply to the whole session.
+    Frames come from `source` alone; results go to every connection and,
+    with RECORDINGS_DIR set, to the session's recording.
+    """
+
+    def __init__(self, user_id: int, query: dict[str, str]):
+        self.user_id = user_id
+        self.frames = asyncio.Queue(maxsize=FRAME_QUEUE_SIZE)
+        self.source: ClientConnection | None = None
+        self.recorder = start_recording(user_id, query)
+        self.task = asyncio.create_task(connect_to_ml_service(user_id, self.frames, query, self.publish))
+        if self.recorder is not None:
+            self.task.add_done_callback(lambda _: self.recorder.close())
+
+    def offer_frame(self, connection: ClientConnection, frame: bytes):
+        """Queues a frame from `connection` if it is (or becomes) the session's source."""
+        if self.source is None:
+            self.source = connection
+        if self.source is connection:
+            put_latest(self.frames, frame, DROPPED_FRAMES)
+        else:
+            IGNORED_FRAMES.inc()
+
+    def publish(self, message: str | bytes):
+        manager.broadcast_to_user(self.user_id, message)
+        if self.recorder is not None:
+            self.recorder.append(message)
+
+
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: dict[int, WebSocket] = {}
+        self.active_connections: dict[int, set[ClientConnection]] = {}
+        self.relays: dict[int, UserRelay] = {}
 
-    async def connect(self, user_id: int, websocket: WebSocket):
+    async def connect(self, user_id: int, websocket: WebSocket, overflow: str = DROP_OLDEST) -> ClientConnection:
         await websocket.accept()
-        self.active_connections[user_id] = websocket
+        connection = ClientConnection(websocket, overflow)
+        self.active_connections.setdefault(user_id, set()).add(connection)
+        return connection
+
+    def relay_for(self, user_id: int, query: dict[str, str]) -> UserRelay:
+        """The user's running tracker relay, started if there is none yet."""
+        relay = self.relays.get(user_id)
+        if relay is None or relay.task.done():
+            relay = self.relays[user_id] = UserRelay(user_id, query)
+        return relay
 
-    def disconnect(self, user_id: int):
-        if user_id in self.active_connections:
+    def disconnect(self, user_id: int, connection: ClientConnection):
+        relay = self.relays.get(user_id)
+        if relay is not None and relay.source is connection:
+            # The next connection to send a frame takes over
+            relay.source = None
+        connections = self.active_connections.get(user_id)
+        if connections is not None:
+            connections.discard(connection)
+            if connections:
+                return
             del self.active_connections[user_id]
+        # The user's last connection is gone, so is the need for a tracker
+        relay = self.relays.pop(user_id, None)
+        if relay is not None:
+            relay.task.cancel()
+
+    def broadcast_to_user(self, user_id: int, message: str | bytes):
+        for connection in self.active_connections.get(user_id, ()):
+            connection.offer(message)
 
-    async def broadcast_to_user(self, user_id: int, message: str):
-        if user_id in self.active_connections:
-            await self.active_connections[user_id].send_text(message)
+    def queue_depth(self) -> int:
+        return sum(len(c.queue) for connections in self.active_connections.values() for c in connections)
 
 manager = ConnectionManager()
 
+registry.register(Gauge(
+    "sensory_gym_send_queue_depth", "Results waiting in browser send queues.", fn=manager.queue_depth))
+registry.register(Gauge(
+    "sensory_gym_connections", "Open Sensory Gym browser connections.",
+    fn=lambda: sum(len(connections) for connections in manager.active_connections.values())))
+
+
+def put_latest(queue: asyncio.Queue, item, dropped: Counter):
+    """Queues `item` without waiting, dropping the oldest item if the queue is full."""
+    if queue.full():
+        queue.get_nowait()
+        dropped.inc()
+    queue.put_nowait(item)
+
+
+async def run_together(*awaitables):
+    """
+    Runs the awaitables as tasks until the first one finishes or fails, then
+    cancels the rest. Re-raises the first failure, if any.
+    """
+    tasks = [asyncio.ensure_future(a) for a in awaitables]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    for task in done:
+        if not task.cancelled() and task.exception() is not None:
+            raise task.exception()
+
+
+async def receive_from_browser(connection: ClientConnection, relay: UserRelay):
+    # The bytes object Starlette hands us is queued as is; framing it for the
+    # tracker copies it once (see MuxConnection.send).
+    while True:
+        message = await connection.websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        frame = message.get("bytes")
+        if frame:
+            relay.offer_frame(connection, frame)
+
+
+async def relay_stream(stream: MuxStream, frames: asyncio.Queue) -> int:
+    """Sends frames on a tracker stream until it ends; returns its close code."""
+    async def send():
+        while True:
+            await stream.send(await frames.get())
+
+    await run_together(send(), stream.wait_closed())
+    return stream.closed.result()
+
+
+def shm_serves(query: dict[str, str]) -> bool:
+    """
+    Whether a session with these tracker options can go over the shared-memory
+    transport. It only answers in f32 with a header and takes no options, so
+    every other session (e.g. the default JSON format, or smoothing) uses the
+    tracker's WebSocket instead.
+    """
+    return (bool(settings.ML_SHM_SOCKET) and query.get("format") == "f32"
+            and query.get("header", "1") != "0" and set(query) <= {"format", "header"})
+
+
+async def relay_shm(user_id: int, frames: asyncio.Queue, publish):
+    """
+    Relays through a co-located tracker's shared-memory transport. Frames are
+    decoded once, on a worker thread, straight into the shared ring.
+    """
+    client = ShmTrackerClient(settings.ML_SHM_SOCKET)
+    await client.connect()
+    print(f"Main backend connected to ML service over shared memory for user {user_id}")
+
+    async def send():
+        while True:
+            written = await asyncio.to_thread(client.write_jpeg, await frames.get())
+            if written is not None:
+                await client.notify(*written)
+
+    async def receive():
+        while True:
+            publish(await client.receive())
 
-async def connect_to_ml_service(user_id: int):
-    ml_service_url = "ws://localhost:8001/ws/track"
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.ws_connect(ml_service_url) as ws_ml:
-                print(f"Main backend connected to ML service for user {user_id}")
-                async for msg in ws_ml:
-                    if msg.type == aiohttp.WSMsgType.TEXT:
-                        await manager.broadcast_to_user(user_id, msg.data)
-                    elif msg.type == aiohttp.WSMsgType.ERROR:
-                        break
+        await run_together(send(), receive())
+    finally:
+        await client.close()
+
+
+# Close code a tracker uses when it is draining or full ("try again later")
+TRY_AGAIN_LATER = 1013
+# Close code a tracker uses for options it doesn't support; every tracker
+# would refuse them, so the browser is told instead of failing over
+UNSUPPORTED_DATA = 1003
+# Once every tracker has refused or dropped the session, the relay waits and
+# tries them all again, doubling the wait each round; it gives up after
+# FAILOVER_ROUNDS rounds in a row. A session that stays up for
+# FAILOVER_STABLE_SECONDS earns the full budget back.
+FAILOVER_ROUNDS = 4
+FAILOVER_BACKOFF = 1.0
+FAILOVER_STABLE_SECONDS = 30.0
+
+
+async def connect_to_ml_service(user_id: int, frames: asyncio.Queue, query: dict[str, str],
+                                publish) -> int | None:
+    """
+    Relays frames to the user's tracker and its results back. The tracker is
+    picked from the fleet by user id, so reconnects stick to the same process;
+    if it refuses the session or drops it, the session moves to the next
+    tracker on the ring, and to a new round over all of them (with backoff)
+    once each has been tried. Returns UNSUPPORTED_DATA if the tracker rejected the
+    session's options.
+    """
+    if shm_serves(query):
+        try:
+            await relay_shm(user_id, frames, publish)
+        except (OSError, asyncio.IncompleteReadError) as e:
+            print(f"Error in shared-memory ML relay for user {user_id}: {e}")
+        return
+
+    session_key = str(user_id)
+    tried = set()
+    rounds = 0
+
+    try:
+        while True:
+            endpoint = fleet.pick(session_key, exclude=tried)
+            if endpoint is None:
+                if rounds >= FAILOVER_ROUNDS:
+                    print(f"No hand tracking service available for user {user_id}")
+                    break
+                await asyncio.sleep(FAILOVER_BACKOFF * 2 ** rounds)
+                rounds += 1
+                tried.clear()
+                continue
+            tried.add(endpoint.url)
+            try:
+                stream = await fleet.open_stream(endpoint, query, publish)
+            except (aiohttp.ClientError, ConnectionError) as e:
+                endpoint.record_failure()
+                print(f"Error connecting to ML service {endpoint.url} for user {user_id}: {e}")
+                continue
+
+            endpoint.failures = 0
+            endpoint.sessions += 1
+            print(f"Main backend connected to ML service {endpoint.url} for user {user_id}")
+            started = time.monotonic()
+            try:
+                close_code = await relay_stream(stream, frames)
+            except (aiohttp.ClientError, ConnectionError):
+                close_code = CONNECTION_LOST
+            finally:
+                endpoint.sessions -= 1
+                await stream.close()
+            if time.monotonic() - started >= FAILOVER_STABLE_SECONDS:
+                rounds = 0
+                tried.clear()
+            if close_code == UNSUPPORTED_DATA:
+                print(f"ML service {endpoint.url} rejected the options of user {user_id}")
+                return close_code
+            if close_code == TRY_AGAIN_LATER:
+                print(f"ML service {endpoint.url} is draining or full, moving user {user_id}")
+            else:
+                print(f"Lost ML service {endpoint.url} for user {user_id}, failing over")
     except Exception as e:
-        print(f"Error connecting to ML service for user {user_id}: {e}")
+        print(f"Error in ML service relay for user {user_id}: {e}")
     finally:
         print(f"Connection to ML service closed for user {user_id}")
 
@@ -52,13 +348,32 @@ async def websocket_endpoint(
     current_user: Annotated[User, Depends(get_current_user_from_token)]
 ):
     user_id = current_user.id
-    await manager.connect(user_id, websocket)
-    ml_task = asyncio.create_task(connect_to_ml_service(user_id))
-    
+    overflow = websocket.query_params.get("overflow", settings.SENSORY_GYM_OVERFLOW)
+    if overflow not in OVERFLOW_POLICIES:
+        await websocket.close(code=1003, reason=f"Unsupported overflow policy '{overflow}'")
+        return
+    connection = await manager.connect(user_id, websocket, overflow)
+    # Tracker options such as ?format=f32 pass through; token and overflow stay here.
+    query = {k: v for k, v in websocket.query_params.items() if k not in ("token", "overflow")}
+    relay = manager.relay_for(user_id, query)
+
     try:
-        while True:
-            await websocket.receive_text() 
+        await run_together(
+            receive_from_browser(connection, relay),
+            connection.write(),
+            # Shielded: the relay outlives this connection while the user has others
+            asyncio.shield(relay.task),
+        )
+        if connection.overflowed:
+            await websocket.close(code=TOO_SLOW, reason="Client is too slow")
+        elif relay.task.done() and not relay.task.cancelled() and relay.task.result() == UNSUPPORTED_DATA:
+            await websocket.close(code=UNSUPPORTED_DATA, reason="The tracker rejected the session options")
+        else:
+            # The relay only ends on its own when no tracker will take the session
+            await websocket.close(code=TRY_AGAIN_LATER)
     except WebSocketDisconnect:
         print(f"User {user_id} disconnected from the main backend.")
-        manager.disconnect(user_id)
-        ml_task.cancel()
\ No newline at end of file
+    except Exception as e:
+        print(f"Error in Sensory Gym relay for user {user_id}: {e}")
+    finally:
+        manager.disconnect(user_id, connection)
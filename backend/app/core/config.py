@@ -10,6 +10,18 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60*24*8
     GEMINI_API_KEY: str
     ML_SERVICE_URL: str = "ws://localhost:8001/ws/track"
+    # Comma-separated /ws/track URLs of a tracker fleet; ML_SERVICE_URL is used when empty
+    ML_SERVICE_URLS: str = ""
+    # Unix socket of a co-located tracker's shared-memory transport, used instead of
+    # the URLs for sessions it can serve (?format=f32 and no other tracker options)
+    ML_SHM_SOCKET: str = ""
     DDS_SERVICE_URL: str
+    # Results queued per Sensory Gym browser connection, and what to do when
+    # the queue is full: "drop_oldest", "latest" or "disconnect"
+    SENSORY_GYM_SEND_QUEUE_SIZE: int = 8
+    SENSORY_GYM_OVERFLOW: str = "drop_oldest"
+    # Directory for Sensory Gym landmark recordings; recording is off when empty
+    RECORDINGS_DIR: str = ""
+    METRICS_ENABLED: bool = True
 
 settings = Settings()
\ No newline at end of file
@@ -1,9 +1,12 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from sqlmodel import Session, select
-from app.api import auth, users, dashboard, resources, forum , sensory_gym,screener
+from app.api import auth, users, dashboard, resources, forum , sensory_gym,screener, recordings, magic_canvas
 from app.core.database import create_db_and_tables, engine
+from app.core.metrics import registry
+from app.services.tracker_fleet import fleet
 from app.models.resource import Provider, Ngo,LibraryItem
 # from app.api import auth, users, dashboard, resources, forum
 def seed_data():
@@ -46,8 +49,10 @@ async def lifespan(app: FastAPI):
     print("Starting up...")
     create_db_and_tables()
     seed_data()
+    fleet.start()
     yield
     print("Shutting down...")
+    await fleet.stop()
 
 app = FastAPI(title="Astra Project API", lifespan=lifespan)
 
@@ -69,4 +74,12 @@ app.include_router(resources.router, prefix="/api/v1")
 app.include_router(forum.router, prefix="/api/v1")
 # app.include_router(gym.router, prefix="/api/v1") 
 app.include_router(sensory_gym.router, prefix="/api/v1", tags=["Sensory Gym"])
-app.include_router(screener.router, prefix="/api/v1") 
\ No newline at end of file
+app.include_router(magic_canvas.router, prefix="/api/v1", tags=["Magic Canvas"])
+app.include_router(screener.router, prefix="/api/v1")
+app.include_router(recordings.router, prefix="/api/v1")
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def read_metrics():
+    """Latency histograms and counters for the backend's vision pipelines."""
+    return registry.render()
@@ -0,0 +1,18 @@
+from sqlmodel import SQLModel
+from typing import List
+
+# Schemas for the Sensory Gym recording endpoints
+class RecordingSummary(SQLModel):
+    session_id: str
+    started_at: float
+    duration: float
+    frames: int
+    landmarks: List[int]
+    fields: str
+
+class LandmarkSeries(SQLModel):
+    session_id: str
+    landmark: int
+    field: str
+    t: List[float]
+    values: List[float]
@@ -0,0 +1,256 @@
+import json
+import queue
+import struct
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+
+# --- Landmark Recordings ---
+# With RECORDINGS_DIR set, every Sensory Gym session's landmarks are kept for
+# progress analytics. A session is a directory under RECORDINGS_DIR/<user id>/
+# holding three files:
+#
+#   meta.json      user, start time, recorded landmark indices and fields
+#   landmarks.f32  one row per result: len(landmarks) x len(fields) float32,
+#                  NaN when no hand was tracked
+#   t.f64          the matching receive times, float64 seconds since start
+#
+# Both data files are append-only, fixed-width columns, so a reader can
+# memory-map them and slice a time range without loading the session. The
+# relay only queues raw tracker messages; decoding and writing happen on one
+# background thread shared by all sessions.
+LANDMARKS_FILE = "landmarks.f32"
+TIMES_FILE = "t.f64"
+META_FILE = "meta.json"
+FIELDS = "xyz"
+NUM_LANDMARKS = 21
+
+# Mirrors the tracker's binary wire format (hand_tracking_service/wire.py)
+WIRE_HEADER = struct.Struct("<BBBBIIff")
+FLAG_HAND_PRESENT = 0x01
+DTYPE_I16 = 1
+INT16_SCALE = 10000.0
+
+
+class SessionRecorder:
+    """
+    Appends one session's tracker results to its recording. `append` only
+    queues the message, so it is safe to call from the relay for every result.
+    """
+
+    def __init__(self, root: Path, user_id: int, query: dict[str, str]):
+        self.started_at = time.time()
+        started = time.strftime("%Y%m%dT%H%M%S", time.gmtime(self.started_at))
+        self.session_id = f"{started}-{uuid.uuid4().hex[:8]}"
+        self.path = root / str(user_id) / self.session_id
+        # The recorded layout follows the session's tracker options (see /ws/track)
+        landmarks = query.get("landmarks")
+        self.landmarks = [int(i) for i in landmarks.split(",")] if landmarks else list(range(NUM_LANDMARKS))
+        self.fields = "".join(f for f in FIELDS if f in query.get("fields", FIELDS))
+        self.fmt = query.get("format", "json")
+        self.header = query.get("header", "1") != "0"
+        self.width = len(self.landmarks) * len(self.fields)
+        self.meta = {"user_id": user_id, "session_id": self.session_id, "started_at": self.started_at,
+                     "landmarks": self.landmarks, "fields": self.fields}
+        self._files = None
+
+    def append(self, message: str | bytes):
+        _writer.put((self, time.time(), message))
+
+    def close(self):
+        _writer.put((self, None, None))
+
+    def decode(self, message: str | bytes) -> np.ndarray:
+        """One result as a row of `width` floats, all NaN without a hand."""
+        row = np.full(self.width, np.nan, dtype=np.float32)
+        if isinstance(message, str):
+            landmarks = json.loads(message)["landmarks"]
+            if landmarks:
+                row[:] = [lm[f] for lm in landmarks for f in self.fields]
+            return row
+
+        body = message
+        dtype = DTYPE_I16 if self.fmt == "i16" else 0
+        if self.header:
+            _, dtype, _, flags, _, _, _, _ = WIRE_HEADER.unpack_from(message)
+            if not flags & FLAG_HAND_PRESENT:
+                return row
+            body = memoryview(message)[WIRE_HEADER.size:]
+        if len(body):
+            if dtype == DTYPE_I16:
+                row[:] = np.frombuffer(body, dtype="<i2") / INT16_SCALE
+            else:
+                row[:] = np.frombuffer(body, dtype="<f4")
+        return row
+
+    def write(self, rows: list[np.ndarray], times: list[float]):
+        if self._files is None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            (self.path / META_FILE).write_text(json.dumps(self.meta))
+            self._files = (open(self.path / LANDMARKS_FILE, "ab"), open(self.path / TIMES_FILE, "ab"))
+        landmarks_file, times_file = self._files
+        # Rows first: a reader never sees a timestamp without its row
+        landmarks_file.write(np.stack(rows).tobytes())
+        landmarks_file.flush()
+        times_file.write(np.asarray(times, dtype=np.float64).tobytes())
+        times_file.flush()
+
+    def finish(self):
+        if self._files is not None:
+            for f in self._files:
+                f.close()
+            self._files = None
+
+
+class RecordingWriter:
+    """The background thread that decodes and writes queued results."""
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def put(self, item):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="landmark-recorder", daemon=True)
+                    self._thread.start()
+        self._queue.put(item)
+
+    def _run(self):
+        while True:
+            # Batch everything that is waiting into one write per session
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            pending: dict[SessionRecorder, tuple[list, list]] = {}
+            closed = []
+            for recorder, t, message in batch:
+                if t is None:
+                    closed.append(recorder)
+                    continue
+                try:
+                    row = recorder.decode(message)
+                except (ValueError, KeyError, TypeError, struct.error):
+                    continue
+                rows, times = pending.setdefault(recorder, ([], []))
+                rows.append(row)
+                times.append(t - recorder.started_at)
+            for recorder, (rows, times) in pending.items():
+                try:
+                    recorder.write(rows, times)
+                except OSError as e:
+                    print(f"Could not write landmark recording {recorder.path}: {e}")
+            for recorder in closed:
+                recorder.finish()
+
+
+_writer = RecordingWriter()
+
+
+def start_recording(user_id: int, query: dict[str, str]) -> SessionRecorder | None:
+    """A recorder for a new session, or None when recording is disabled."""
+    if not settings.RECORDINGS_DIR:
+        return None
+    try:
+        return SessionRecorder(Path(settings.RECORDINGS_DIR), user_id, query)
+    except ValueError:
+        # Malformed landmark options; the tracker refuses the session anyway
+        return None
+
+
+class Recording:
+    """Read-only, memory-mapped view of a recorded session."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.meta = json.loads((path / META_FILE).read_text())
+        self.fields = self.meta["fields"]
+        self.landmarks = self.meta["landmarks"]
+        width = len(self.landmarks) * len(self.fields)
+        times = _map(path / TIMES_FILE, np.float64)
+        rows = _map(path / LANDMARKS_FILE, np.float32)
+        n = min(len(times), len(rows) // width)
+        self.t = times[:n]
+        self.values = rows[:n * width].reshape(n, len(self.landmarks), len(self.fields))
+
+    @property
+    def frames(self) -> int:
+        return len(self.t)
+
+    @property
+    def duration(self) -> float:
+        return float(self.t[-1]) if len(self.t) else 0.0
+
+    def series(self, landmark: int, field: str, start: float | None = None,
+               end: float | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (t, values) of one coordinate between `start` and `end` seconds,
+        without the frames where no hand was tracked.
+        """
+        column = self.values[:, self.landmarks.index(landmark), self.fields.index(field)]
+        lo = 0 if start is None else int(np.searchsorted(self.t, start, side="left"))
+        hi = len(self.t) if end is None else int(np.searchsorted(self.t, end, side="right"))
+        t = np.asarray(self.t[lo:hi])
+        values = np.asarray(column[lo:hi], dtype=np.float64)
+        tracked = ~np.isnan(values)
+        return t[tracked], values[tracked]
+
+
+def _map(path: Path, dtype) -> np.ndarray:
+    if not path.exists() or path.stat().st_size == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r")
+
+
+def list_recordings(user_id: int) -> list[Recording]:
+    if not settings.RECORDINGS_DIR:
+        return []
+    root = Path(settings.RECORDINGS_DIR) / str(user_id)
+    if not root.is_dir():
+        return []
+    recordings = [Recording(p) for p in root.iterdir() if (p / META_FILE).exists()]
+    return sorted(recordings, key=lambda r: r.meta["started_at"])
+
+
+def open_recording(user_id: int, session_id: str) -> Recording | None:
+    if not settings.RECORDINGS_DIR or "/" in session_id or session_id.startswith("."):
+        return None
+    path = Path(settings.RECORDINGS_DIR) / str(user_id) / session_id
+    if not (path / META_FILE).exists():
+        return None
+    return Recording(path)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling: indices of `points` samples
+    that keep the visual shape of the (x, y) series.
+    """
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, points - 1).astype(np.intp)
+    selected = np.empty(points, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
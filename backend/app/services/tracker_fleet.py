@@ -0,0 +1,152 @@
+import asyncio
+import bisect
+import hashlib
+from urllib.parse import urlsplit, urlunsplit
+
+import aiohttp
+
+from app.core.config import settings
+from app.services.tracker_mux import MuxStream, TrackerMux
+
+# --- Tracker Fleet ---
+# The backend can spread Sensory Gym sessions over several hand tracking
+# service processes. Endpoints sit on a consistent-hash ring, so a user keeps
+# landing on the same tracker across reconnects, and adding or removing one
+# tracker only moves the sessions that hashed to it. Trackers are health
+# checked in the background; a tracker that is down, draining or full is
+# skipped and its sessions move to the next tracker on the ring.
+#
+# To try it locally, start several trackers (`uvicorn main:app --port 8001`,
+# `--port 8002`, ...) and set ML_SERVICE_URLS to their /ws/track URLs,
+# separated by commas.
+#
+# Sessions reach their tracker as streams on a few shared /ws/mux
+# connections (see tracker_mux.py), all made through one aiohttp session that
+# lives from `start` to `stop`, i.e. for the app's lifespan.
+VIRTUAL_NODES = 64
+HEALTH_CHECK_INTERVAL = 5.0
+HEALTH_CHECK_TIMEOUT = 2.0
+# Consecutive failed checks (or connects) before a tracker is taken out of rotation
+MAX_FAILURES = 2
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class TrackerEndpoint:
+    """One hand tracking service process and what the backend knows about it."""
+
+    def __init__(self, url: str):
+        self.url = url
+        scheme, netloc, _, _, _ = urlsplit(url)
+        http_scheme = "https" if scheme == "wss" else "http"
+        self.health_url = urlunsplit((http_scheme, netloc, "/", "", ""))
+        self.healthy = True
+        self.draining = False
+        self.failures = 0
+        self.sessions = 0
+        self.capacity = 0  # 0 means the tracker reports no limit
+        self.mux = TrackerMux(url)
+
+    @property
+    def saturated(self) -> bool:
+        return self.capacity > 0 and self.sessions >= self.capacity
+
+    @property
+    def available(self) -> bool:
+        return self.healthy and not self.draining and not self.saturated
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= MAX_FAILURES:
+            self.healthy = False
+
+    def status(self) -> dict:
+        return {"url": self.url, "healthy": self.healthy, "draining": self.draining,
+                "sessions": self.sessions, "capacity": self.capacity}
+
+
+class TrackerFleet:
+    """
+    Session-sticky routing over a pool of tracker endpoints.
+    """
+
+    def __init__(self, urls: list[str]):
+        self.endpoints = [TrackerEndpoint(url) for url in urls]
+        self._ring = sorted(
+            (_hash(f"{endpoint.url}#{i}"), endpoint)
+            for endpoint in self.endpoints
+            for i in range(VIRTUAL_NODES)
+        )
+        self._keys = [key for key, _ in self._ring]
+        self._health_task = None
+        self.http = None
+
+    @classmethod
+    def from_settings(cls) -> "TrackerFleet":
+        urls = [url.strip() for url in settings.ML_SERVICE_URLS.split(",") if url.strip()]
+        return cls(urls or [settings.ML_SERVICE_URL])
+
+    def candidates(self, session_key: str):
+        """
+        Endpoints in ring order starting at the session's position, each
+        listed once. The first one is the session's home tracker.
+        """
+        seen = set()
+        start = bisect.bisect(self._keys, _hash(session_key))
+        for i in range(len(self._ring)):
+            endpoint = self._ring[(start + i) % len(self._ring)][1]
+            if endpoint.url not in seen:
+                seen.add(endpoint.url)
+                yield endpoint
+
+    def pick(self, session_key: str, exclude: set[str] = frozenset()) -> TrackerEndpoint | None:
+        """The first available tracker for this session, skipping `exclude`."""
+        for endpoint in self.candidates(session_key):
+            if endpoint.url not in exclude and endpoint.available:
+                return endpoint
+        return None
+
+    async def open_stream(self, endpoint: TrackerEndpoint, query: dict[str, str], on_result) -> MuxStream:
+        """Opens a tracking session on `endpoint` over its shared connections."""
+        return await endpoint.mux.open_stream(self.http, query, on_result)
+
+    async def check(self, http: aiohttp.ClientSession, endpoint: TrackerEndpoint):
+        try:
+            timeout = aiohttp.ClientTimeout(total=HEALTH_CHECK_TIMEOUT)
+            async with http.get(endpoint.health_url, timeout=timeout) as response:
+                response.raise_for_status()
+                health = await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            endpoint.record_failure()
+            return
+        endpoint.failures = 0
+        endpoint.healthy = True
+        endpoint.draining = bool(health.get("draining", False))
+        endpoint.capacity = int(health.get("capacity", 0))
+        # The tracker's own count includes sessions from other backends
+        endpoint.sessions = int(health.get("sessions", endpoint.sessions))
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.gather(*(self.check(self.http, e) for e in self.endpoints))
+            await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+
+    def start(self):
+        self.http = aiohttp.ClientSession()
+        self._health_task = asyncio.create_task(self._health_loop())
+
+    async def stop(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+        await asyncio.gather(*(e.mux.close() for e in self.endpoints), return_exceptions=True)
+        if self.http is not None:
+            await self.http.close()
+
+
+fleet = TrackerFleet.from_settings()
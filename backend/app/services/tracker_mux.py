@@ -0,0 +1,145 @@
+import asyncio
+import itertools
+import struct
+from urllib.parse import urlencode, urlsplit, urlunsplit
+
+import aiohttp
+
+# --- Multiplexed Tracker Connections ---
+# The client side of the hand tracking service's /ws/mux endpoint
+# (ml_services/hand_tracking_service/mux.py). Instead of one upstream
+# WebSocket per user, each tracker gets a small pool of long-lived
+# connections, and every user's session is a stream on one of them, tagged
+# with a stream id. Opening a session costs one OPEN message, not a handshake.
+HEADER = struct.Struct("<BI")
+CLOSE_CODE = struct.Struct("<H")
+
+OPEN = 1
+FRAME = 2
+CLOSE = 3
+TEXT = 4
+BINARY = 5
+CLOSED = 6
+
+# Upstream connections per tracker; streams go to the least busy one
+MUX_CONNECTIONS = 2
+# Reported as a stream's close code when its connection drops
+CONNECTION_LOST = 1006
+
+
+class MuxStream:
+    """One user's tracking session on a shared upstream connection."""
+
+    def __init__(self, connection: "MuxConnection", stream_id: int, on_result):
+        self.connection = connection
+        self.id = stream_id
+        self.on_result = on_result
+        self.closed = asyncio.get_running_loop().create_future()
+
+    async def send(self, frame: bytes):
+        await self.connection.send(FRAME, self.id, frame)
+
+    async def wait_closed(self) -> int:
+        """Waits until the tracker ends the stream and returns its close code."""
+        return await asyncio.shield(self.closed)
+
+    def finish(self, code: int):
+        if not self.closed.done():
+            self.closed.set_result(code)
+        self.connection.streams.pop(self.id, None)
+
+    async def close(self):
+        if self.closed.done():
+            return
+        self.finish(1000)
+        try:
+            await self.connection.send(CLOSE, self.id)
+        except (aiohttp.ClientError, ConnectionError):
+            pass
+
+
+class MuxConnection:
+    """A single upstream /ws/mux WebSocket and the streams riding on it."""
+
+    def __init__(self, ws: aiohttp.ClientWebSocketResponse):
+        self.ws = ws
+        self.streams: dict[int, MuxStream] = {}
+        self._reader = asyncio.create_task(self._read())
+
+    @property
+    def closed(self) -> bool:
+        return self._reader.done()
+
+    async def send(self, kind: int, stream_id: int, payload: bytes = b""):
+        # A WebSocket message has to be one buffer, so prefixing the stream
+        # header copies the frame once. aiohttp copies it again to mask it,
+        # as every client-to-server message must be (RFC 6455).
+        await self.ws.send_bytes(HEADER.pack(kind, stream_id) + payload)
+
+    async def _read(self):
+        try:
+            async for msg in self.ws:
+                if msg.type == aiohttp.WSMsgType.ERROR:
+                    break
+                if msg.type != aiohttp.WSMsgType.BINARY:
+                    continue
+                kind, stream_id = HEADER.unpack_from(msg.data)
+                stream = self.streams.get(stream_id)
+                if stream is None:
+                    continue
+                payload = msg.data[HEADER.size:]
+                if kind == TEXT:
+                    stream.on_result(payload.decode())
+                elif kind == BINARY:
+                    stream.on_result(payload)
+                elif kind == CLOSED:
+                    stream.finish(CLOSE_CODE.unpack_from(payload)[0])
+        finally:
+            for stream in list(self.streams.values()):
+                stream.finish(CONNECTION_LOST)
+
+    async def close(self):
+        await self.ws.close()
+        await asyncio.gather(self._reader, return_exceptions=True)
+
+
+class TrackerMux:
+    """
+    The pool of multiplexed connections to one tracker. Connections are
+    opened on demand, up to MUX_CONNECTIONS, and replaced once they drop.
+    """
+
+    def __init__(self, url: str, connections: int = MUX_CONNECTIONS):
+        scheme, netloc, _, _, _ = urlsplit(url)
+        self.url = urlunsplit((scheme, netloc, "/ws/mux", "", ""))
+        self.max_connections = connections
+        self.connections: list[MuxConnection] = []
+        self._ids = itertools.count(1)
+        self._lock = asyncio.Lock()
+
+    async def _connection(self, http: aiohttp.ClientSession) -> MuxConnection:
+        async with self._lock:
+            self.connections = [c for c in self.connections if not c.closed]
+            if len(self.connections) < self.max_connections:
+                self.connections.append(MuxConnection(await http.ws_connect(self.url)))
+            return min(self.connections, key=lambda c: len(c.streams))
+
+    async def open_stream(self, http: aiohttp.ClientSession, query: dict[str, str],
+                          on_result) -> MuxStream:
+        """
+        Opens a session with the given /ws/track options. Results are passed
+        to `on_result` as they arrive (str for JSON, bytes for binary formats).
+        """
+        connection = await self._connection(http)
+        stream = MuxStream(connection, next(self._ids), on_result)
+        connection.streams[stream.id] = stream
+        try:
+            await connection.send(OPEN, stream.id, urlencode(query).encode())
+        except BaseException:
+            stream.finish(CONNECTION_LOST)
+            raise
+        return stream
+
+    async def close(self):
+        await asyncio.gather(*(c.close() for c in self.connections), return_exceptions=True)
+        self.connections = []
@@ -0,0 +1,96 @@
+import asyncio
+import json
+import struct
+import uuid
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+# --- Shared-Memory Tracker Client ---
+# The write side of the hand tracking service's shared-memory transport
+# (ml_services/hand_tracking_service/shm_transport.py), for installs where
+# the backend and the tracker share a host. Frames are decoded once, straight
+# into a shared ring, and the tracker reads them in place; landmarks come
+# back on a Unix socket in the service's binary f32 wire format, so only
+# sessions that asked for exactly that use it (see shm_serves in
+# app/api/sensory_gym.py). Other sessions and remote deployments keep using
+# the WebSocket at ML_SERVICE_URL.
+DOORBELL = struct.Struct("<II")
+SLOT_HEADER = struct.Struct("<IHH8x")
+LENGTH = struct.Struct("<I")
+
+# Frames larger than this are downscaled to fit a ring slot.
+MAX_WIDTH = 1280
+MAX_HEIGHT = 720
+RING_SLOTS = 4
+
+
+class ShmTrackerClient:
+    """One user's shared-memory connection to a co-located hand tracker."""
+
+    def __init__(self, socket_path: str, max_width: int = MAX_WIDTH,
+                 max_height: int = MAX_HEIGHT, slots: int = RING_SLOTS):
+        self.socket_path = socket_path
+        self.max_width = max_width
+        self.max_height = max_height
+        self.slots = slots
+        self.slot_bytes = SLOT_HEADER.size + max_width * max_height * 3
+        self.shm = None
+        self.reader = None
+        self.writer = None
+        self.seq = 0
+
+    async def connect(self):
+        self.shm = shared_memory.SharedMemory(
+            name=f"astra_{uuid.uuid4().hex[:16]}", create=True, size=self.slots * self.slot_bytes
+        )
+        self.reader, self.writer = await asyncio.open_unix_connection(self.socket_path)
+        hello = {"shm": self.shm.name, "slots": self.slots, "slot_bytes": self.slot_bytes}
+        self.writer.write(json.dumps(hello).encode() + b"\n")
+        await self.writer.drain()
+
+    def write_jpeg(self, image_bytes: bytes) -> tuple[int, int] | None:
+        """
+        Decodes a JPEG frame into the next ring slot as RGB and returns its
+        (slot, seq) for `notify`, or None if the bytes could not be decoded.
+        This does the CPU work, so async callers should run it in a thread.
+        """
+        frame = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            return None
+
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.max_width / w, self.max_height / h)
+        if scale < 1.0:
+            w, h = int(w * scale), int(h * scale)
+            frame = cv2.resize(frame, (w, h), interpolation=cv2.INTER_AREA)
+
+        self.seq += 1
+        index = self.seq % self.slots
+        offset = index * self.slot_bytes
+        # Invalidate the slot, write the pixels in place, then publish the seq
+        SLOT_HEADER.pack_into(self.shm.buf, offset, 0, h, w)
+        view = np.ndarray((h, w, 3), dtype=np.uint8, buffer=self.shm.buf, offset=offset + SLOT_HEADER.size)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=view)
+        del view
+        SLOT_HEADER.pack_into(self.shm.buf, offset, self.seq, h, w)
+        return index, self.seq
+
+    async def notify(self, index: int, seq: int):
+        """Tells the tracker that the frame in slot `index` is ready."""
+        self.writer.write(DOORBELL.pack(index, seq))
+        await self.writer.drain()
+
+    async def receive(self) -> bytes:
+        """The next result message, in the tracker's binary f32 wire format."""
+        (length,) = LENGTH.unpack(await self.reader.readexactly(LENGTH.size))
+        return await self.reader.readexactly(length)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
@@ -1,63 +1,145 @@
+import asyncio
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import cv2
 import mediapipe as mp
 import numpy as np
 
-# --- Initialization (This is fine, it runs only once) ---
+from app.core.metrics import Counter, Histogram, StageTimer, registry
+
+# Gestures are shared with the games and the tracker (ml_services/common)
+sys.path.append(str(Path(__file__).resolve().parents[2] / "ml_services"))
+
+from common.filters import landmark_array
+from common.gestures import POINTING, GestureRecognizer
+
+logger = logging.getLogger(__name__)
+
+# --- Magic Canvas Engine ---
+# Every canvas session owns its own MediaPipe tracker, pen state and strokes,
+# so any number of canvases can run at once without sharing tracking state.
+# A session's tracker only ever runs on the session's own worker thread.
+#
+# Instead of a per-frame isDrawing/x/y dict, each frame yields the cursor and
+# the stroke segments that changed since the previous frame:
+#   {"op": "down", "stroke": id, "points": [[x, y]]}   a new stroke starts
+#   {"op": "move", "stroke": id, "points": [[x, y]]}   it continues
+#   {"op": "up", "stroke": id}                         it ends
+# Coordinates are normalized to [0, 1] and already mirrored like a selfie
+# view, so the frame itself is never flipped.
 mp_hands = mp.solutions.hands
-hands = mp.solutions.Hands(max_num_hands=1, min_detection_confidence=0.7)
-# ---------------------------------------------------------
-
-def process_frame_for_magic_canvas(frame_bytes: bytes) -> dict:
-    """
-    Processes a single video frame to detect hand gestures for the Magic Canvas.
-    This function is STATELESS and does not draw anything. It only returns data.
-    """
-    try:
-        # Decode image bytes to a numpy array
-        nparr = np.frombuffer(frame_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        if frame is None:
-            return {"isDrawing": False, "x": None, "y": None, "gesture": "Error"}
-
-        frame = cv2.flip(frame, 1)
-        h, w, _ = frame.shape
-        
-        # Process the frame with MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = hands.process(rgb_frame)
-
-        # Default response if no hand is detected
-        response = {"isDrawing": False, "x": None, "y": None, "gesture": "No hand"}
-
-        if results.multi_hand_landmarks:
-            lm = results.multi_hand_landmarks[0].landmark
-            
-            # Get coordinates of the index finger tip
-            index_finger_tip_x = int(lm[8].x * w)
-            index_finger_tip_y = int(lm[8].y * h)
-
-            # Check if the index finger is up and the middle finger is down (Drawing Gesture)
-            is_index_up = lm[8].y < lm[6].y
-            is_middle_up = lm[12].y < lm[10].y
-
-            if is_index_up and not is_middle_up:
-                response = {
-                    "isDrawing": True,
-                    "x": index_finger_tip_x,
-                    "y": index_finger_tip_y,
-                    "gesture": "Drawing"
-                }
+HANDS_OPTIONS = {"max_num_hands": 1, "min_detection_confidence": 0.7}
+# Decode straight to RGB where OpenCV supports it (4.10+), skipping a conversion
+IMREAD_RGB = getattr(cv2, "IMREAD_COLOR_RGB", None)
+COORD_DECIMALS = 4
+
+# --- Metrics ---
+STAGE_SECONDS = registry.register(Histogram(
+    "magic_canvas_stage_seconds", "Time spent in each stage of the Magic Canvas pipeline.", label="stage"))
+DECODE = STAGE_SECONDS.labels("decode")
+CONVERT = STAGE_SECONDS.labels("convert")
+INFERENCE = STAGE_SECONDS.labels("inference")
+GESTURE = STAGE_SECONDS.labels("gesture")
+FRAMES = registry.register(Counter(
+    "magic_canvas_frames_total", "Frames processed for the Magic Canvas."))
+UNDECODABLE_FRAMES = registry.register(Counter(
+    "magic_canvas_undecodable_frames_total", "Magic Canvas frames that could not be decoded."))
+ERRORS = registry.register(Counter(
+    "magic_canvas_errors_total", "Magic Canvas frames that failed with an unexpected error."))
+
+
+class MagicCanvasSession:
+    """One canvas: its tracker, whether the pen is down, and the strokes drawn so far."""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="magic-canvas")
+        self.hands = None
+        self.strokes: list[list[list[float]]] = []
+        self.pen_down = False
+        # Pointing draws (see ml_services/common/gestures.py)
+        self.gestures = GestureRecognizer(max_hands=1)
+
+    async def _submit(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    async def start(self):
+        # Build the graph on the thread that will run it
+        self.hands = await self._submit(lambda: mp_hands.Hands(**HANDS_OPTIONS))
+
+    async def process(self, frame_bytes: bytes) -> dict:
+        """Tracks one frame on the session's thread and returns its update."""
+        return await self._submit(self.process_frame, frame_bytes)
+
+    async def close(self):
+        if self.hands is not None:
+            await self._submit(self.hands.close)
+            self.hands = None
+        self.executor.shutdown(wait=False)
+
+    def process_frame(self, frame_bytes: bytes) -> dict:
+        """
+        Processes a single video frame and returns
+        {"gesture", "cursor", "segments"} for the stroke changes it caused.
+        """
+        try:
+            timer = StageTimer()
+
+            # Decode image bytes to a numpy array
+            nparr = np.frombuffer(frame_bytes, np.uint8)
+            if IMREAD_RGB is not None:
+                rgb_frame = cv2.imdecode(nparr, IMREAD_RGB)
+                timer.lap(DECODE)
             else:
-                # Any other gesture stops the drawing
-                response = {
-                    "isDrawing": False,
-                    "x": index_finger_tip_x,
-                    "y": index_finger_tip_y,
-                    "gesture": "Not Drawing"
-                }
-                
-        return response
-
-    except Exception as e:
-        print(f"Error processing frame: {e}")
-        return {"isDrawing": False, "x": None, "y": None, "gesture": "Error"}
\ No newline at end of file
+                frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+                timer.lap(DECODE)
+                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) if frame is not None else None
+                timer.lap(CONVERT)
+            if rgb_frame is None:
+                UNDECODABLE_FRAMES.inc()
+                return {"gesture": "Error", "cursor": None, "segments": []}
+
+            # Process the frame with MediaPipe
+            results = self.hands.process(rgb_frame)
+            timer.lap(INFERENCE)
+            FRAMES.inc()
+
+            segments = []
+            now = time.perf_counter()
+            if not results.multi_hand_landmarks:
+                gesture, cursor = "No hand", None
+                drawing = False
+                self.gestures.update(None, now)
+            else:
+                hand = results.multi_hand_landmarks[0]
+                lm = hand.landmark
+                # Index finger tip, mirrored instead of flipping the frame
+                cursor = [round(1.0 - lm[8].x, COORD_DECIMALS), round(lm[8].y, COORD_DECIMALS)]
+
+                self.gestures.update(landmark_array(hand), now)
+                drawing = self.gestures.is_active(POINTING)
+                gesture = "Drawing" if drawing else "Not Drawing"
+
+            if drawing:
+                op = "move" if self.pen_down else "down"
+                if not self.pen_down:
+                    self.strokes.append([])
+                    self.pen_down = True
+                self.strokes[-1].append(cursor)
+                segments.append({"op": op, "stroke": len(self.strokes) - 1, "points": [cursor]})
+            elif self.pen_down:
+                # Any other gesture (or losing the hand) lifts the pen
+                self.pen_down = False
+                segments.append({"op": "up", "stroke": len(self.strokes) - 1})
+            timer.lap(GESTURE)
+
+            return {"gesture": gesture, "cursor": cursor, "segments": segments}
+
+        except Exception:
+            ERRORS.inc()
+            logger.exception("Error processing Magic Canvas frame")
+            return {"gesture": "Error", "cursor": None, "segments": []}
@@ -0,0 +1,92 @@
+import queue
+import threading
+import time
+
+import numpy as np
+import pygame
+
+from common.pipeline import LatencyMeter
+
+# --- Low-Latency Sample Playback ---
+# Hit sounds for the desktop games. Everything slow happens at startup:
+# samples are decoded to PCM once, and the silence MP3 encoders pad the start
+# of a file with is trimmed, so a sound is audible from its first sample.
+# While playing, the vision loop only drops a name into a queue; a separate
+# thread starts the sound on a channel reserved for it, so a drum and the
+# success jingle triggered together never steal each other's channel.
+#
+# The mixer is opened with a small buffer: at 44.1 kHz, 256 frames is ~6 ms of
+# output latency, well under one 30 fps camera frame (~33 ms).
+FREQUENCY = 44100
+BUFFER = 256
+# Channels reserved per sound; a retrigger plays on the next one, so a quick
+# second hit overlaps the first instead of cutting it off
+CHANNELS_PER_SOUND = 2
+# Leading samples quieter than this (about -40 dBFS) are trimmed
+SILENCE = 328
+
+
+def _trim_leading_silence(sound: pygame.mixer.Sound) -> pygame.mixer.Sound:
+    samples = pygame.sndarray.array(sound)
+    loud = np.flatnonzero(np.abs(samples.reshape(len(samples), -1)).max(axis=1) > SILENCE)
+    if len(loud) == 0 or loud[0] == 0:
+        return sound
+    return pygame.sndarray.make_sound(np.ascontiguousarray(samples[loud[0]:]))
+
+
+class SoundBoard:
+    """
+    Plays named samples from a background thread. `trigger` never blocks;
+    `latency` measures the time from the hit (the capture of the frame it
+    was seen in, when the game passes it) to the sound reaching the mixer,
+    plus the mixer's own buffer.
+    """
+
+    def __init__(self, paths: dict[str, str], frequency: int = FREQUENCY, buffer: int = BUFFER):
+        pygame.mixer.pre_init(frequency, -16, 2, buffer)
+        pygame.mixer.init()
+        frequency = pygame.mixer.get_init()[0]
+        self.output_latency = buffer / frequency
+
+        # Decoded up front: playing never touches the files again
+        self.sounds = {name: _trim_leading_silence(pygame.mixer.Sound(path)) for name, path in paths.items()}
+
+        total = len(self.sounds) * CHANNELS_PER_SOUND
+        pygame.mixer.set_num_channels(max(total, pygame.mixer.get_num_channels()))
+        # Reserved channels are never picked by Sound.play(), so the pool is ours alone
+        pygame.mixer.set_reserved(total)
+        self.channels = {
+            name: [pygame.mixer.Channel(i * CHANNELS_PER_SOUND + k) for k in range(CHANNELS_PER_SOUND)]
+            for i, name in enumerate(self.sounds)
+        }
+        self._next = dict.fromkeys(self.sounds, 0)
+
+        self.latency = LatencyMeter("hit-to-sound")
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="audio", daemon=True)
+        self._thread.start()
+
+    def trigger(self, name: str, at: float | None = None):
+        """
+        Queues `name` to play. `at` is when the hit happened, in
+        time.perf_counter() seconds: for a tracked hit, when its camera frame
+        was captured. Without it latency is measured from this call.
+        """
+        self._queue.put((name, time.perf_counter() if at is None else at))
+
+    def _run(self):
+        while True:
+            name, at = self._queue.get()
+            if name is None:
+                break
+            channels = self.channels[name]
+            i = self._next[name]
+            self._next[name] = (i + 1) % len(channels)
+            channels[i].play(self.sounds[name])
+            self.latency.add(time.perf_counter() - at + self.output_latency)
+
+    def close(self):
+        self._queue.put((None, None))
+        self._thread.join(timeout=1.0)
+        print(self.latency.summary())
+        pygame.mixer.quit()
@@ -0,0 +1,173 @@
+import json
+import random
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+# --- Magic Drums Engine ---
+# The drum game without a camera, window or speakers: feed it the landmarks
+# of each tracked frame and it returns what happened. The desktop game plays
+# sounds for the events; the tracking service sends them to browser clients
+# (`?game=drums`, see hand_tracking_service/main.py); recorded landmark
+# traces can be replayed through it to check scoring offline.
+#
+# Events, in the order they happen within a frame:
+#   hit      a fingertip entered a zone whose cooldown had run out
+#   success  ...and it was the zone the sequence asked for
+#   failure  ...and it was not; the sequence starts over
+#   round    the whole sequence was played; a new one is shuffled
+#
+# Layouts are JSON files (see magic_drums/layouts/default.json): normalized
+# zone boxes [x1, y1, x2, y2] in mirrored (selfie) view, RGB colours, and the
+# per-zone cooldown in seconds.
+LAYOUTS_DIR = Path(__file__).resolve().parent.parent / "magic_drums" / "layouts"
+DEFAULT_LAYOUT = "default"
+# Index and middle fingertips
+FINGERTIPS = (8, 12)
+
+HIT = "hit"
+SUCCESS = "success"
+FAILURE = "failure"
+ROUND = "round"
+
+
+@dataclass
+class DrumEvent:
+    kind: str
+    drum: str | None
+    t: float
+
+    def to_dict(self) -> dict:
+        return {"kind": self.kind, "drum": self.drum, "t": self.t}
+
+
+class DrumLayout:
+    """Zone names, boxes and colours as parallel arrays, ready for vectorized hit tests."""
+
+    def __init__(self, zones: list[dict], cooldown: float):
+        if not zones:
+            raise ValueError("A drum layout needs at least one zone")
+        self.names = [z["name"] for z in zones]
+        self.boxes = np.array([z["box"] for z in zones], dtype=np.float32).reshape(len(zones), 4)
+        # RGB, as in the layout file
+        self.colors = [tuple(z.get("color", (255, 255, 255))) for z in zones]
+        self.cooldown = float(cooldown)
+
+    @property
+    def bgr_colors(self) -> list[tuple]:
+        """The zone colours in OpenCV's BGR order, for drawing."""
+        return [tuple(reversed(color)) for color in self.colors]
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DrumLayout":
+        return cls(data["zones"], data.get("cooldown", 1.5))
+
+
+def load_layout(name: str = DEFAULT_LAYOUT, directory: Path = LAYOUTS_DIR) -> DrumLayout:
+    """Loads `<directory>/<name>.json`; names are restricted so they can come from a query string."""
+    if not re.fullmatch(r"[A-Za-z0-9_-]+", name):
+        raise ValueError(f"Invalid drum layout name '{name}'")
+    path = directory / f"{name}.json"
+    try:
+        return DrumLayout.from_dict(json.loads(path.read_text()))
+    except FileNotFoundError:
+        raise ValueError(f"Unknown drum layout '{name}'") from None
+
+
+class DrumEngine:
+    """
+    One player's game: the layout, the sequence to play and how far along it
+    they are. `mirror` flips x for landmarks of an unmirrored camera frame.
+    """
+
+    def __init__(self, layout: DrumLayout | None = None, fingertips=FINGERTIPS,
+                 mirror: bool = False, seed=None):
+        self.layout = layout or load_layout()
+        self.fingertips = np.asarray(fingertips, dtype=np.intp)
+        self.mirror = mirror
+        self.last_hit = np.full(len(self.layout.names), -np.inf)
+        self._random = random.Random(seed)
+        self.sequence = list(self.layout.names)
+        self.new_round()
+
+    def new_round(self):
+        self._random.shuffle(self.sequence)
+        self.step = 0
+
+    @property
+    def target(self) -> str:
+        """The drum the player should hit next."""
+        return self.sequence[self.step]
+
+    def touched(self, hands: np.ndarray) -> np.ndarray:
+        """
+        Which zones any fingertip of any hand is inside, as a boolean array.
+        `hands` is (hands, landmarks, >= 2) or a single (landmarks, >= 2) hand.
+        """
+        hands = np.asarray(hands, dtype=np.float32)
+        if hands.ndim == 2:
+            hands = hands[None]
+        tips = hands[:, self.fingertips, :2].reshape(-1, 2)
+        x = tips[:, 0:1]
+        if self.mirror:
+            x = 1.0 - x
+        y = tips[:, 1:2]
+        x1, y1, x2, y2 = self.layout.boxes.T
+        # (fingertips, zones); NaN coordinates of an untracked hand compare False
+        inside = (x > x1) & (x < x2) & (y > y1) & (y < y2)
+        return inside.any(axis=0)
+
+    def update(self, hands: np.ndarray | None, t: float) -> list[DrumEvent]:
+        """Advances the game with one frame's landmarks (None without a hand)."""
+        if hands is None or len(hands) == 0:
+            return []
+        hit = self.touched(hands) & (t - self.last_hit > self.layout.cooldown)
+        events = []
+        for zone in np.flatnonzero(hit):
+            self.last_hit[zone] = t
+            name = self.layout.names[zone]
+            events.append(DrumEvent(HIT, name, t))
+            if name == self.target:
+                events.append(DrumEvent(SUCCESS, name, t))
+                self.step += 1
+                if self.step >= len(self.sequence):
+                    events.append(DrumEvent(ROUND, None, t))
+                    self.new_round()
+            else:
+                events.append(DrumEvent(FAILURE, name, t))
+                self.step = 0
+        return events
+
+
+def replay(engine: DrumEngine, times, frames, landmarks=None, fields: str = "xyz") -> list[DrumEvent]:
+    """
+    Runs a recorded trace through `engine`: `times` in seconds and `frames`
+    as (frames, landmarks, fields) with NaN rows where no hand was tracked,
+    e.g. a backend landmark recording's `t` and `values`.
+
+    Recordings of a landmark subscription hold only some landmarks; pass
+    their ids as `landmarks` (and their `fields`, e.g. "xy") so rows are
+    matched by id instead of by position.
+    """
+    frames = np.asarray(frames, dtype=np.float32)
+    if "x" not in fields or "y" not in fields:
+        raise ValueError(f"A drum replay needs the x and y fields, the recording has '{fields}'")
+    tips = [int(i) for i in engine.fingertips]
+    if landmarks is None:
+        landmarks = range(frames.shape[1])
+    landmarks = list(landmarks)
+    missing = [i for i in tips if i not in landmarks]
+    if missing:
+        raise ValueError(f"The recording has no landmarks {missing}, which the drums are played with")
+    if len(landmarks) != frames.shape[1]:
+        raise ValueError(f"The recording names {len(landmarks)} landmarks but holds {frames.shape[1]}")
+
+    # Full-size hands with only the fingertips filled in
+    hands = np.full((len(frames), max(tips) + 1, 2), np.nan, dtype=np.float32)
+    hands[:, tips] = frames[:, [landmarks.index(i) for i in tips]][..., [fields.index("x"), fields.index("y")]]
+    events = []
+    for t, hand in zip(times, hands):
+        events.extend(engine.update(hand, float(t)))
+    return events
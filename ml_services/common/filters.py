@@ -0,0 +1,75 @@
+import math
+
+import numpy as np
+
+# --- One-Euro Filter Defaults ---
+# Tuned for normalized landmark coordinates (0..1 across the frame).
+# Lower MIN_CUTOFF removes more jitter when the hand is still; higher BETA
+# lets the filter follow fast movements with less lag.
+MIN_CUTOFF = 1.0
+BETA = 2.0
+D_CUTOFF = 1.0
+
+
+def landmark_array(hand_landmarks) -> np.ndarray:
+    """Converts a MediaPipe NormalizedLandmarkList to a (21, 3) float32 array."""
+    landmarks = hand_landmarks.landmark
+    return np.fromiter(
+        (value for lm in landmarks for value in (lm.x, lm.y, lm.z)),
+        dtype=np.float32,
+        count=len(landmarks) * 3,
+    ).reshape(-1, 3)
+
+
+def _alpha(cutoff, dt: float):
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    """
+    A One-Euro filter (Casiez et al., CHI 2012) applied element-wise to an
+    array of coordinates, e.g. all 21 x 3 landmark values at once.
+
+    Besides smoothing, the filter keeps a smoothed derivative, so it can
+    extrapolate the signal forward to frames that were never measured.
+    """
+
+    def __init__(self, min_cutoff: float = MIN_CUTOFF, beta: float = BETA, d_cutoff: float = D_CUTOFF):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.dx = None
+        self.t = None
+
+    def __call__(self, x: np.ndarray, t: float) -> np.ndarray:
+        """Filters the measurement `x` taken at time `t` (seconds)."""
+        x = np.asarray(x, dtype=np.float32)
+        if self.x is None or t <= self.t:
+            if self.x is None:
+                self.dx = np.zeros_like(x)
+            self.x, self.t = x.copy(), t
+            return self.x.copy()
+
+        dt = t - self.t
+        dx = (x - self.x) / dt
+        self.dx += _alpha(self.d_cutoff, dt) * (dx - self.dx)
+
+        cutoff = self.min_cutoff + self.beta * np.abs(self.dx)
+        self.x += _alpha(cutoff, dt) * (x - self.x)
+        self.t = t
+        return self.x.copy()
+
+    def predict(self, t: float) -> np.ndarray | None:
+        """Extrapolates the filtered signal to time `t`, or None before any measurement."""
+        if self.x is None:
+            return None
+        return self.x + self.dx * max(t - self.t, 0.0)
+
+    def speed(self) -> float:
+        """The largest smoothed rate of change across all coordinates, per second."""
+        return float(np.abs(self.dx).max()) if self.dx is not None else 0.0
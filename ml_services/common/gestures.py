@@ -0,0 +1,191 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+# --- Gesture Recognition ---
+# Hand gestures from landmark arrays, for any game. Landmarks go in as one
+# NumPy array: (21, >= 2) for one hand, (hands, 21, >= 2) for a frame, or
+# (frames, hands, 21, >= 2) for a recorded trace. Every feature is computed
+# for all fingers, hands and frames at once, so recognizing every gesture on
+# every frame of every session costs a handful of array operations.
+#
+# Features are measured in the image plane and divided by the hand's palm
+# length (wrist to middle knuckle), so they hold for any hand size, distance
+# from the camera and rotation:
+#   extension  per finger, how much farther the tip is from the base of the
+#              hand than the middle joint is: > 0 straight, < 0 curled
+#   pinch      thumb tip to index tip distance
+#
+# Each feature switches on and off at different thresholds (hysteresis), so
+# a finger hovering near the threshold doesn't flicker between states.
+# Gestures are patterns over the five fingers' states; a GestureRecognizer
+# turns their changes into events:
+#   start    a gesture began on a hand
+#   end      it stopped (or the hand was lost)
+#
+# The backend's Magic Canvas imports this module too (backend/ml/magic_canvas.py).
+WRIST = 0
+THUMB, INDEX, MIDDLE, RING, PINKY = range(5)
+FINGERS = ("thumb", "index", "middle", "ring", "pinky")
+TIPS = np.array([4, 8, 12, 16, 20])
+# The joint each tip is compared with (the thumb's IP joint, the others' PIP)
+JOINTS = np.array([3, 6, 10, 14, 18])
+# The point distances are measured from: the thumb folds across the palm
+# towards the pinky knuckle, the other fingers curl towards the wrist
+BASES = np.array([17, WRIST, WRIST, WRIST, WRIST])
+MIDDLE_MCP = 9
+
+# Extension thresholds in palm lengths (on, off); the thumb moves less
+EXTEND_ON = np.array([0.10, 0.30, 0.30, 0.30, 0.30], dtype=np.float32)
+EXTEND_OFF = np.array([0.00, 0.15, 0.15, 0.15, 0.15], dtype=np.float32)
+# Pinch thresholds in palm lengths (on below, off above)
+PINCH_ON = 0.25
+PINCH_OFF = 0.40
+
+START = "start"
+END = "end"
+
+# Finger patterns: 1 extended, 0 curled, None either
+OPEN_PALM = "open_palm"
+POINTING = "pointing"
+TWO_FINGERS = "two_fingers"
+FIST = "fist"
+PINCH = "pinch"
+PATTERNS = {
+    OPEN_PALM: (1, 1, 1, 1, 1),
+    POINTING: (None, 1, 0, 0, 0),
+    TWO_FINGERS: (None, 1, 1, 0, 0),
+    FIST: (None, 0, 0, 0, 0),
+}
+GESTURES = (*PATTERNS, PINCH)
+
+_CARE = np.array([[v is not None for v in p] for p in PATTERNS.values()])
+_WANT = np.array([[bool(v) for v in p] for p in PATTERNS.values()])
+
+
+@dataclass
+class GestureEvent:
+    kind: str
+    gesture: str
+    hand: int
+    t: float
+
+    def to_dict(self) -> dict:
+        return {"kind": self.kind, "gesture": self.gesture, "hand": self.hand, "t": self.t}
+
+
+def hand_features(hands: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (extension, pinch) for landmarks of shape (..., 21, >= 2): extension is
+    (..., 5) and pinch is (...), both in palm lengths. Hands with NaN
+    landmarks (not tracked) come out as NaN.
+    """
+    xy = np.asarray(hands, dtype=np.float32)[..., :2]
+    palm = np.linalg.norm(xy[..., MIDDLE_MCP, :] - xy[..., WRIST, :], axis=-1)
+    palm = np.where(palm > 0, palm, np.nan)[..., None]
+    base = xy[..., BASES, :]
+    tip = np.linalg.norm(xy[..., TIPS, :] - base, axis=-1)
+    joint = np.linalg.norm(xy[..., JOINTS, :] - base, axis=-1)
+    extension = (tip - joint) / palm
+    pinch = np.linalg.norm(xy[..., TIPS[THUMB], :] - xy[..., TIPS[INDEX], :], axis=-1) / palm[..., 0]
+    return extension, pinch
+
+
+def _hysteresis(value: np.ndarray, state: np.ndarray, on, off) -> np.ndarray:
+    """New boolean state: on above `on`, off below `off`, unchanged between; NaN is off."""
+    return np.where(value > on, True, np.where(value < off, False, state & ~np.isnan(value)))
+
+
+def match(extended: np.ndarray, pinched: np.ndarray) -> np.ndarray:
+    """Which gestures (in GESTURES order) each hand shows, as (..., len(GESTURES)) booleans."""
+    fingers = ((extended[..., None, :] == _WANT) | ~_CARE).all(axis=-1)
+    return np.concatenate([fingers, pinched[..., None]], axis=-1)
+
+
+class GestureRecognizer:
+    """
+    One player's gesture state: which fingers are extended and which
+    gestures are active on each of up to `max_hands` hands. Callbacks added
+    with `subscribe` receive every event as it happens; `update` also
+    returns them.
+    """
+
+    def __init__(self, max_hands: int = 2):
+        self.max_hands = max_hands
+        self._subscribers = []
+        self.reset()
+
+    def reset(self):
+        self.extended = np.zeros((self.max_hands, len(FINGERS)), dtype=bool)
+        self.pinched = np.zeros(self.max_hands, dtype=bool)
+        self.active = np.zeros((self.max_hands, len(GESTURES)), dtype=bool)
+
+    def subscribe(self, callback, gestures=None):
+        """Calls `callback(event)` for events of `gestures` (all of them if None)."""
+        self._subscribers.append((callback, frozenset(gestures) if gestures is not None else None))
+
+    def gestures(self, hand: int = 0) -> list[str]:
+        """The gestures active on a hand."""
+        return [GESTURES[i] for i in np.flatnonzero(self.active[hand])]
+
+    def is_active(self, gesture: str, hand: int = 0) -> bool:
+        return bool(self.active[hand, GESTURES.index(gesture)])
+
+    def update(self, hands: np.ndarray | None, t: float) -> list[GestureEvent]:
+        """Advances with one frame's landmarks (None without a hand)."""
+        shape = (self.max_hands,)
+        if hands is None or len(hands) == 0:
+            return self.step(np.full(shape + (len(FINGERS),), np.nan), np.full(shape, np.nan), t)
+        hands = np.asarray(hands, dtype=np.float32)
+        if hands.ndim == 2:
+            hands = hands[None]
+        extension, pinch = hand_features(hands[:self.max_hands])
+        if len(extension) < self.max_hands:
+            missing = self.max_hands - len(extension)
+            extension = np.concatenate([extension, np.full((missing, len(FINGERS)), np.nan)])
+            pinch = np.concatenate([pinch, np.full(missing, np.nan)])
+        return self.step(extension, pinch, t)
+
+    def step(self, extension: np.ndarray, pinch: np.ndarray, t: float) -> list[GestureEvent]:
+        """Advances with precomputed features of shape (max_hands, 5) and (max_hands,)."""
+        self.extended = _hysteresis(extension, self.extended, EXTEND_ON, EXTEND_OFF)
+        # Pinching is distance going down, so the thresholds are negated
+        self.pinched = _hysteresis(-pinch, self.pinched, -PINCH_ON, -PINCH_OFF)
+        active = match(self.extended, self.pinched)
+        # A lost hand shows no gesture, not a fist
+        active &= ~np.isnan(extension).any(axis=-1, keepdims=True)
+        changed = active != self.active
+        self.active = active
+        if not changed.any():
+            return []
+
+        events = []
+        for hand, gesture in zip(*np.nonzero(changed)):
+            kind = START if active[hand, gesture] else END
+            events.append(GestureEvent(kind, GESTURES[gesture], int(hand), t))
+        for callback, gestures in self._subscribers:
+            for event in events:
+                if gestures is None or event.gesture in gestures:
+                    callback(event)
+        return events
+
+
+def replay(recognizer: GestureRecognizer, times, frames) -> list[GestureEvent]:
+    """
+    Runs a recorded trace through `recognizer`: `times` in seconds and
+    `frames` as (frames, landmarks, fields) or (frames, hands, landmarks,
+    fields), with NaN rows where no hand was tracked. Features for the whole
+    trace are computed in one pass; only the hysteresis runs frame by frame.
+    """
+    frames = np.asarray(frames, dtype=np.float32)
+    if frames.ndim == 3:
+        frames = frames[:, None]
+    extension, pinch = hand_features(frames[:, :recognizer.max_hands])
+    missing = recognizer.max_hands - extension.shape[1]
+    if missing > 0:
+        extension = np.pad(extension, ((0, 0), (0, missing), (0, 0)), constant_values=np.nan)
+        pinch = np.pad(pinch, ((0, 0), (0, missing)), constant_values=np.nan)
+    events = []
+    for t, frame_extension, frame_pinch in zip(times, extension, pinch):
+        events.extend(recognizer.step(frame_extension, frame_pinch, float(t)))
+    return events
@@ -0,0 +1,212 @@
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+# --- Capture / Inference / Render Pipeline ---
+# The desktop games used to read the camera, run MediaPipe, draw and show the
+# frame in one loop, so every frame paid for the camera's wait *and* the
+# model's runtime back to back. Here each stage runs on its own:
+#
+#   capture thread    reads the camera continuously and keeps only the
+#                     newest frame (older ones are dropped, never queued)
+#   inference thread  runs the model on the newest captured frame
+#   render (caller)   draws and shows the newest (frame, result) pair; stays
+#                     on the calling thread because HighGUI windows must
+#
+# Stages are linked by single-slot queues, so a slow stage makes the others
+# skip frames instead of falling behind. Latency is measured from the moment
+# a frame was captured until its render call returned (after imshow/waitKey),
+# i.e. motion-to-photon minus the camera's own exposure and transfer time.
+#
+# The camera can be configured with environment variables:
+#   CAMERA_INDEX=0  CAMERA_WIDTH=640  CAMERA_HEIGHT=480  CAMERA_FOURCC=MJPG
+
+# Frames the driver may buffer; 1 keeps cap.read() from returning stale frames
+CAMERA_BUFFER_SIZE = 1
+# Failed reads in a row before the camera counts as gone (USB hiccups and
+# driver timeouts fail a read or two), and the pause between them
+MAX_READ_FAILURES = 10
+READ_RETRY_DELAY = 0.05
+# Latency samples kept for the summary printed when the pipeline stops
+LATENCY_WINDOW = 300
+
+
+def camera_settings() -> dict:
+    """Capture options for Pipeline from the CAMERA_* environment variables."""
+    width = os.getenv("CAMERA_WIDTH")
+    height = os.getenv("CAMERA_HEIGHT")
+    return {
+        "source": int(os.getenv("CAMERA_INDEX", "0")),
+        "width": int(width) if width else None,
+        "height": int(height) if height else None,
+        "fourcc": os.getenv("CAMERA_FOURCC") or None,
+    }
+
+
+@dataclass
+class Frame:
+    image: np.ndarray
+    # time.perf_counter() right after the frame was read
+    captured_at: float
+    index: int
+
+
+class LatestSlot:
+    """A single-slot queue: `put` replaces whatever was not taken yet."""
+
+    def __init__(self):
+        self._item = None
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        with self._cond:
+            self._item = item
+            self._cond.notify()
+
+    def get(self, timeout: float | None = None):
+        """The newest item, or None on timeout or once the slot is closed and empty."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._item is not None or self._closed, timeout)
+            item, self._item = self._item, None
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+class LatencyMeter:
+    """A latency in ms: a smoothed value for on-screen display plus recent samples."""
+
+    def __init__(self, label: str = "motion-to-photon", window: int = LATENCY_WINDOW):
+        self.label = label
+        self.ms = 0.0
+        self.samples = deque(maxlen=window)
+
+    def add(self, seconds: float):
+        ms = seconds * 1000
+        self.ms = ms if not self.samples else self.ms + 0.1 * (ms - self.ms)
+        self.samples.append(ms)
+
+    def summary(self) -> str:
+        if not self.samples:
+            return f"{self.label}: no samples"
+        p50, p95 = np.percentile(self.samples, [50, 95])
+        return f"{self.label} p50 {p50:.1f} ms, p95 {p95:.1f} ms over {len(self.samples)} samples"
+
+
+class CameraCapture:
+    """Reads a camera on a background thread, keeping only the newest frame."""
+
+    def __init__(self, source=0, width: int | None = None, height: int | None = None,
+                 fourcc: str | None = None, mirror: bool = True):
+        self.cap = cv2.VideoCapture(source)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Could not open camera {source!r}")
+        if fourcc:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+        if width:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        if height:
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, CAMERA_BUFFER_SIZE)
+        self.mirror = mirror
+        self.frames = LatestSlot()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="camera-capture", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        index = 0
+        failures = 0
+        try:
+            while not self._stop.is_set():
+                ok, image = self.cap.read()
+                if not ok:
+                    failures += 1
+                    if failures >= MAX_READ_FAILURES:
+                        print(f"Camera stopped delivering frames ({failures} failed reads in a row)")
+                        break
+                    time.sleep(READ_RETRY_DELAY)
+                    continue
+                failures = 0
+                captured_at = time.perf_counter()
+                if self.mirror:
+                    image = cv2.flip(image, 1)
+                self.frames.put(Frame(image, captured_at, index))
+                index += 1
+        finally:
+            self.frames.close()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self.cap.release()
+
+
+class Pipeline:
+    """
+    Runs `infer(frame) -> result` on an inference thread and
+    `render(frame, result) -> bool` on the calling thread; rendering stops when
+    `render` returns False or the camera stops delivering frames.
+
+    `infer` should only run the model (it is the only thread touching it);
+    game state belongs in `render`, which sees every result in order.
+    """
+
+    def __init__(self, infer, render, source=0, width: int | None = None,
+                 height: int | None = None, fourcc: str | None = None, mirror: bool = True):
+        self.infer = infer
+        self.render = render
+        self.capture = CameraCapture(source, width, height, fourcc, mirror)
+        self.results = LatestSlot()
+        self.latency = LatencyMeter()
+        self._error = None
+        self._thread = threading.Thread(target=self._infer, name="inference", daemon=True)
+
+    def _infer(self):
+        try:
+            while True:
+                frame = self.capture.frames.get()
+                if frame is None:
+                    break
+                self.results.put((frame, self.infer(frame)))
+        except Exception as e:
+            self._error = e
+        finally:
+            self.results.close()
+
+    def run(self):
+        self.capture.start()
+        self._thread.start()
+        try:
+            while True:
+                item = self.results.get(timeout=0.5)
+                if item is None:
+                    if self.results.closed:
+                        break
+                    continue
+                frame, result = item
+                keep_going = self.render(frame, result)
+                self.latency.add(time.perf_counter() - frame.captured_at)
+                if keep_going is False:
+                    break
+        finally:
+            self.capture.stop()
+            self._thread.join(timeout=1.0)
+            print(self.latency.summary())
+        if self._error is not None:
+            raise self._error
@@ -0,0 +1,143 @@
+import struct
+
+import cv2
+import numpy as np
+
+# --- Vector Strokes ---
+# Drawings are kept as strokes (colour, brush size, points) instead of
+# pixels. Points are simplified while the stroke is being drawn, so a slow,
+# straight movement costs two points rather than one per frame, and a saved
+# drawing is a few kilobytes instead of a full-resolution PNG.
+#
+# File layout (little-endian, "varint" = unsigned LEB128, "svarint" = zigzag):
+#   b"STRK", version u8, width u16, height u16, stroke count varint
+#   per stroke: B, G, R u8, size u8, point count varint,
+#               first point as two svarints, then (dx, dy) svarint deltas
+MAGIC = b"STRK"
+VERSION = 1
+HEADER = struct.Struct("<4sBHH")
+
+# Maximum distance (pixels) a dropped point may lie from the simplified line
+EPSILON = 1.5
+# Longest run of points checked against one candidate segment; bounds the
+# per-point cost of simplification on long straight moves
+MAX_WINDOW = 64
+
+
+class Stroke:
+    """
+    One continuous line of the drawing, simplified online.
+
+    The simplification is greedy: the points since the last kept one form
+    an open window, and the window grows while every point in it lies within
+    `epsilon` of the segment from the last kept point to the newest one. When
+    a point breaks that (or the window holds MAX_WINDOW points), the previous
+    window end is kept. Every dropped point is therefore within `epsilon` of
+    the simplified line, but unlike Ramer-Douglas-Peucker, which sees the
+    whole stroke, it may keep more points than strictly needed.
+    """
+
+    __slots__ = ("color", "size", "epsilon", "points", "_window")
+
+    def __init__(self, color: tuple, size: int, epsilon: float = EPSILON):
+        self.color = tuple(int(c) for c in color)
+        self.size = int(size)
+        self.epsilon = epsilon
+        self.points: list[tuple[int, int]] = []
+        self._window: list[tuple[int, int]] = []
+
+    def add(self, x: int, y: int):
+        point = (int(x), int(y))
+        if not self.points:
+            self.points.append(point)
+            return
+        if self._window and (len(self._window) >= MAX_WINDOW
+                             or _max_distance(self.points[-1], point, self._window) > self.epsilon):
+            self.points.append(self._window[-1])
+            self._window = []
+        self._window.append(point)
+
+    def finish(self):
+        """Keeps the end of the stroke; call when the pen is lifted."""
+        if self._window:
+            self.points.append(self._window[-1])
+            self._window = []
+
+    def polyline(self) -> np.ndarray:
+        """The simplified points, including the current end, as an (n, 2) int32 array."""
+        points = self.points + self._window[-1:]
+        return np.array(points, dtype=np.int32).reshape(-1, 2)
+
+
+def _max_distance(a: tuple, b: tuple, points: list) -> float:
+    p = np.asarray(points, dtype=np.float64)
+    ax, ay = a
+    dx, dy = b[0] - ax, b[1] - ay
+    length = np.hypot(dx, dy)
+    if length == 0:
+        return float(np.hypot(p[:, 0] - ax, p[:, 1] - ay).max())
+    return float(np.abs(dx * (p[:, 1] - ay) - dy * (p[:, 0] - ax)).max() / length)
+
+
+def rasterize(strokes: list[Stroke], canvas: np.ndarray) -> np.ndarray:
+    """Draws the strokes onto `canvas` in order (later strokes on top)."""
+    for stroke in strokes:
+        points = stroke.polyline()
+        if len(points) == 1:
+            x, y = points[0]
+            cv2.line(canvas, (x, y), (x, y), stroke.color, stroke.size)
+        elif len(points) > 1:
+            cv2.polylines(canvas, [points], False, stroke.color, stroke.size)
+    return canvas
+
+
+def _write_varint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def encode_strokes(strokes: list[Stroke], width: int, height: int) -> bytes:
+    out = bytearray(HEADER.pack(MAGIC, VERSION, width, height))
+    _write_varint(out, len(strokes))
+    for stroke in strokes:
+        points = stroke.polyline().astype(np.int64)
+        out += bytes(stroke.color) + bytes((stroke.size,))
+        _write_varint(out, len(points))
+        if len(points):
+            deltas = np.diff(points, axis=0, prepend=[[0, 0]]).ravel()
+            for value in ((deltas << 1) ^ (deltas >> 63)).tolist():
+                _write_varint(out, value)
+    return bytes(out)
+
+
+def decode_strokes(data: bytes) -> tuple[int, int, list[Stroke]]:
+    """Returns (width, height, strokes) of an encoded drawing."""
+    magic, version, width, height = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a stroke drawing, or an unsupported version")
+    count, pos = _read_varint(data, HEADER.size)
+    strokes = []
+    for _ in range(count):
+        b, g, r, size = data[pos:pos + 4]
+        n, pos = _read_varint(data, pos + 4)
+        values = np.empty(2 * n, dtype=np.int64)
+        for i in range(2 * n):
+            zigzag, pos = _read_varint(data, pos)
+            values[i] = (zigzag >> 1) ^ -(zigzag & 1)
+        stroke = Stroke((b, g, r), size)
+        stroke.points = [tuple(p) for p in np.cumsum(values.reshape(-1, 2), axis=0).tolist()]
+        strokes.append(stroke)
+    return width, height, strokes
@@ -0,0 +1,72 @@
+"""
+Compares the /ws/track wire formats: bytes per frame and encode time.
+
+Run from the hand_tracking_service directory:
+    python benchmarks/bench_wire_format.py [--frames 20000]
+
+The benchmark uses synthetic MediaPipe-shaped results, so it needs neither
+a camera nor the MediaPipe models.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wire import FORMAT_F32, FORMAT_I16, NUM_LANDMARKS, encode_binary, encode_json, hand_from_results
+
+
+def fake_results(rng: random.Random):
+    landmarks = [
+        SimpleNamespace(x=rng.random(), y=rng.random(), z=rng.uniform(-0.2, 0.2))
+        for _ in range(NUM_LANDMARKS)
+    ]
+    classification = SimpleNamespace(label="Right", score=rng.uniform(0.7, 1.0))
+    return SimpleNamespace(
+        multi_hand_landmarks=[SimpleNamespace(landmark=landmarks)],
+        multi_handedness=[SimpleNamespace(classification=[classification])],
+    )
+
+
+def legacy_json(results) -> str:
+    # The original per-landmark dict path, kept here as the baseline.
+    landmarks_list = []
+    for landmark in results.multi_hand_landmarks[0].landmark:
+        landmarks_list.append({"x": landmark.x, "y": landmark.y, "z": landmark.z})
+    return json.dumps({"landmarks": landmarks_list}, separators=(",", ":"))
+
+
+def bench(name, encode, corpus):
+    start = time.perf_counter()
+    size = 0
+    for i, results in enumerate(corpus):
+        size += len(encode(i, results))
+    elapsed = time.perf_counter() - start
+    n = len(corpus)
+    print(f"{name:<18} {size / n:>8.0f} B/frame {elapsed / n * 1e6:>9.2f} us/frame")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [fake_results(rng) for _ in range(args.frames)]
+
+    print(f"{args.frames} frames, one hand of {NUM_LANDMARKS} landmarks")
+    bench("legacy json", lambda i, r: legacy_json(r).encode(), corpus)
+    bench("json", lambda i, r: encode_json(hand_from_results(r), fps=30.0).encode(), corpus)
+    for fmt in (FORMAT_F32, FORMAT_I16):
+        bench(fmt, lambda i, r: encode_binary(hand_from_results(r), fmt, frame_id=i, fps=30.0), corpus)
+        bench(f"{fmt} (no header)",
+              lambda i, r: encode_binary(hand_from_results(r), fmt, header=False), corpus)
+
+
+if __name__ == "__main__":
+    main()
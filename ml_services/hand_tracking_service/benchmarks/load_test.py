@@ -0,0 +1,198 @@
+"""
+Replay load test for /ws/track with many concurrent clients.
+
+Replays a recorded corpus of frames at a fixed rate from N concurrent
+WebSocket clients and reports throughput, round-trip latency percentiles,
+dropped frames and service CPU per session. Needs no camera.
+
+Run from the hand_tracking_service directory, e.g.:
+    python benchmarks/load_test.py --corpus frames/ --clients 8 --fps 15 --duration 30
+    python benchmarks/load_test.py --corpus clip.mp4 --clients 4 --query format=f32
+
+--corpus is either a directory of .jpg files (replayed in name order) or a
+video file, whose frames are JPEG-encoded up front. Without --url the
+service is started locally on a free port and stopped afterwards.
+Binary formats need the header (don't pass header=0) to match round trips.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import cv2
+import websockets
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVICE_DIR))
+
+from wire import HEADER
+
+
+def load_corpus(path: str, limit: int) -> list[bytes]:
+    source = Path(path)
+    if source.is_dir():
+        files = sorted(p for p in source.iterdir() if p.suffix.lower() in (".jpg", ".jpeg"))
+        return [p.read_bytes() for p in files[:limit]]
+
+    frames = []
+    capture = cv2.VideoCapture(str(source))
+    while len(frames) < limit:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes())
+    capture.release()
+    return frames
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+class ClientStats:
+    def __init__(self):
+        self.sent = 0
+        self.received = 0
+        self.server_dropped = 0
+        self.rtts = []
+
+
+async def run_client(url: str, corpus: list[bytes], fps: float, duration: float,
+                     offset: int) -> ClientStats:
+    stats = ClientStats()
+    send_times = {}
+
+    async with websockets.connect(url, max_size=None) as ws:
+        async def sender():
+            interval = 1.0 / fps
+            start = time.perf_counter()
+            while time.perf_counter() - start < duration:
+                # Frame ids count from 1 in send order, matching the service's frame_id
+                frame = corpus[(offset + stats.sent) % len(corpus)]
+                stats.sent += 1
+                send_times[stats.sent] = time.perf_counter()
+                await ws.send(frame)
+                next_at = start + stats.sent * interval
+                await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+
+        async def receiver():
+            async for message in ws:
+                now = time.perf_counter()
+                if isinstance(message, bytes):
+                    _, _, _, _, frame_id, dropped, _, _ = HEADER.unpack_from(message)
+                else:
+                    data = json.loads(message)
+                    if "frame_id" not in data:
+                        # Drum or gesture events (always JSON), not a tracked frame
+                        continue
+                    frame_id, dropped = data["frame_id"], data["dropped"]
+                sent_at = send_times.pop(frame_id, None)
+                if sent_at is not None:
+                    stats.rtts.append(now - sent_at)
+                stats.received += 1
+                stats.server_dropped = dropped
+
+        receiving = asyncio.create_task(receiver())
+        await sender()
+        # Give in-flight frames a moment to come back before closing
+        await asyncio.sleep(0.5)
+        receiving.cancel()
+    return stats
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_service(port: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=SERVICE_DIR,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1)
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Hand tracking service did not start within 60 s")
+
+
+def cpu_seconds(pid: int) -> float | None:
+    # utime + stime of the service process, Linux only
+    try:
+        fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", required=True, help="Directory of JPEG frames or a video file")
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--fps", type=float, default=10.0, help="Send rate per client")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of sending per client")
+    parser.add_argument("--max-frames", type=int, default=1000, help="Frames to load from the corpus")
+    parser.add_argument("--query", default="", help="Extra /ws/track query string, e.g. format=f32&roi=1")
+    parser.add_argument("--url", help="Existing service base URL, e.g. ws://host:8001")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus, args.max_frames)
+    if not corpus:
+        sys.exit(f"No frames found in {args.corpus}")
+
+    process = None
+    base_url = args.url
+    if base_url is None:
+        port = free_port()
+        process = start_service(port)
+        base_url = f"ws://127.0.0.1:{port}"
+    url = f"{base_url}/ws/track" + (f"?{args.query}" if args.query else "")
+
+    try:
+        cpu_before = cpu_seconds(process.pid) if process else None
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            run_client(url, corpus, args.fps, args.duration, offset=i * 7)
+            for i in range(args.clients)
+        ))
+        elapsed = time.perf_counter() - started
+        cpu_after = cpu_seconds(process.pid) if process else None
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    sent = sum(r.sent for r in results)
+    received = sum(r.received for r in results)
+    dropped = sum(r.server_dropped for r in results)
+    rtts = [rtt * 1000 for r in results for rtt in r.rtts]
+
+    print(f"corpus: {len(corpus)} frames, {args.clients} clients at {args.fps:g} fps for {args.duration:g} s")
+    print(f"url: {url}")
+    print(f"sent {sent} frames, received {received} results, {dropped} dropped by the service")
+    print(f"throughput: {received / elapsed:.1f} results/s total, "
+          f"{received / elapsed / args.clients:.1f} per client")
+    print(f"round trip ms: p50 {percentile(rtts, 50):.1f}  p95 {percentile(rtts, 95):.1f}  "
+          f"p99 {percentile(rtts, 99):.1f}")
+    if cpu_before is not None and cpu_after is not None:
+        cpu = (cpu_after - cpu_before) / elapsed * 100
+        print(f"service CPU: {cpu:.0f}% total, {cpu / args.clients:.0f}% per session")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""
+Streams a video file to /ws/stream as a live H.264 encoder would.
+
+The file's frames are re-encoded with x264 (zerolatency, Annex-B) and each
+encoded frame is sent as its own message at the file's frame rate, so the
+service decodes the stream incrementally exactly as it would a camera.
+Prints the results received, their server-side latency, and the bytes sent
+compared with JPEG-per-frame on /ws/track. Needs no camera.
+
+Run from the hand_tracking_service directory, e.g.:
+    python benchmarks/stream_file.py --video clip.mp4
+    python benchmarks/stream_file.py --video clip.mp4 --query models=hands,expressions
+
+Without --url the service is started locally on a free port and stopped afterwards.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import av
+import cv2
+import websockets
+
+from load_test import free_port, percentile, start_service
+
+
+def encode_stream(path: str, limit: int) -> tuple[list[bytes], list[int], float]:
+    """(H.264 packets, JPEG sizes of the same frames, fps) for the file's first `limit` frames."""
+    packets, jpeg_sizes = [], []
+    with av.open(path) as source:
+        video = source.streams.video[0]
+        fps = float(video.average_rate or 30)
+        encoder = av.CodecContext.create("libx264", "w")
+        encoder.width, encoder.height = video.codec_context.width, video.codec_context.height
+        encoder.pix_fmt = "yuv420p"
+        encoder.time_base = video.time_base or av.time_base
+        encoder.options = {"preset": "veryfast", "tune": "zerolatency"}
+        for frame in source.decode(video):
+            if len(jpeg_sizes) >= limit:
+                break
+            bgr = frame.to_ndarray(format="bgr24")
+            jpeg_sizes.append(len(cv2.imencode(".jpg", bgr, [cv2.IMWRITE_JPEG_QUALITY, 80])[1]))
+            frame.pts = len(jpeg_sizes)
+            packets.extend(bytes(p) for p in encoder.encode(frame.reformat(format="yuv420p")))
+        packets.extend(bytes(p) for p in encoder.encode(None))
+    return packets, jpeg_sizes, fps
+
+
+async def stream(url: str, packets: list[bytes], fps: float) -> list[dict]:
+    results = []
+    async with websockets.connect(url, max_size=None) as ws:
+        async def sender():
+            interval = 1.0 / fps
+            start = time.perf_counter()
+            for i, packet in enumerate(packets):
+                await asyncio.sleep(max(0.0, start + i * interval - time.perf_counter()))
+                await ws.send(packet)
+            # Give the last frames time to come back before hanging up
+            await asyncio.sleep(1.0)
+            await ws.close()
+
+        async def receiver():
+            try:
+                async for message in ws:
+                    if isinstance(message, str):
+                        results.append(json.loads(message))
+            except websockets.ConnectionClosed:
+                pass
+
+        await asyncio.gather(sender(), receiver())
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--video", required=True, help="Any video file PyAV can read")
+    parser.add_argument("--max-frames", type=int, default=300)
+    parser.add_argument("--query", default="", help="Extra /ws/stream query string")
+    parser.add_argument("--url", help="Existing service base URL, e.g. ws://host:8001")
+    args = parser.parse_args()
+
+    packets, jpeg_sizes, fps = encode_stream(args.video, args.max_frames)
+    if not packets:
+        sys.exit(f"No frames found in {args.video}")
+
+    process = None
+    base_url = args.url
+    if base_url is None:
+        port = free_port()
+        process = start_service(port)
+        base_url = f"ws://127.0.0.1:{port}"
+    url = f"{base_url}/ws/stream?container=h264" + (f"&{args.query}" if args.query else "")
+
+    try:
+        results = await stream(url, packets, fps)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    landmarks = [r for r in results if "landmarks" in r]
+    latencies = [r["latency_ms"] for r in landmarks]
+    stream_bytes = sum(len(p) for p in packets)
+    print(f"{len(jpeg_sizes)} frames at {fps:g} fps, {len(landmarks)} results "
+          f"({sum(1 for r in landmarks if r['landmarks'])} with a hand)")
+    print(f"server latency ms: p50 {percentile(latencies, 50):.1f}  p95 {percentile(latencies, 95):.1f}")
+    print(f"sent {stream_bytes / len(jpeg_sizes) / 1024:.1f} KB/frame as H.264, "
+          f"vs {sum(jpeg_sizes) / len(jpeg_sizes) / 1024:.1f} KB/frame as JPEG")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from wire import JSON_DECIMALS
+
+# --- Face Models ---
+# Sessions pick their models with `?models=` (see SessionOptions in main.py):
+#
+#   hands        the hand landmarks, as before (the default)
+#   face         the 468 face mesh landmarks, as [x, y, z] rows
+#   expressions  a few expression scores derived from the face mesh
+#
+# Every enabled model runs on the same decoded RGB frame, so a second model
+# only adds its own inference time.
+HANDS = "hands"
+FACE = "face"
+EXPRESSIONS = "expressions"
+MODELS = (HANDS, FACE, EXPRESSIONS)
+
+FACE_MESH_OPTIONS = {
+    "static_image_mode": False,
+    "max_num_faces": 1,
+    "refine_landmarks": False,
+    "min_detection_confidence": 0.5,
+    "min_tracking_confidence": 0.5,
+}
+NUM_FACE_LANDMARKS = 468
+
+# Face mesh indices used for the expression scores
+FOREHEAD, CHIN = 10, 152
+CHEEK_LEFT, CHEEK_RIGHT = 234, 454
+MOUTH_LEFT, MOUTH_RIGHT = 61, 291
+LIP_UPPER, LIP_LOWER = 13, 14
+# Upper lid, lower lid, outer corner, inner corner; left then right eye
+EYES = np.array([[159, 145, 33, 133], [386, 374, 263, 362]])
+# Brow middle above each eye's upper lid
+BROWS = np.array([105, 334])
+
+# Ratios that map to a score of 0 (neutral) and 1 (full expression)
+SMILE_RANGE = (0.36, 0.50)      # mouth width / face width
+JAW_OPEN_RANGE = (0.01, 0.25)   # lip gap / face height
+EYES_OPEN_RANGE = (0.08, 0.30)  # lid gap / eye width
+BROW_RAISE_RANGE = (0.10, 0.16)  # brow to lid / face height
+
+
+def parse_models(value: str | None) -> frozenset[str]:
+    """The models named in `?models=a,b`; hands alone when not given."""
+    if not value:
+        return frozenset((HANDS,))
+    models = frozenset(m.strip() for m in value.split(","))
+    if not models or not models <= set(MODELS):
+        raise ValueError(f"models must be a comma-separated subset of {', '.join(MODELS)}")
+    return models
+
+
+@dataclass
+class FaceResult:
+    """The first detected face: (468, 3) float32 landmarks and its expression scores."""
+    landmarks: np.ndarray
+    expressions: dict[str, float] | None = None
+
+
+def face_from_results(results) -> np.ndarray | None:
+    if not results.multi_face_landmarks:
+        return None
+    landmarks = results.multi_face_landmarks[0].landmark
+    return np.fromiter(
+        (value for lm in landmarks for value in (lm.x, lm.y, lm.z)),
+        dtype=np.float32,
+        count=NUM_FACE_LANDMARKS * 3,
+    ).reshape(NUM_FACE_LANDMARKS, 3)
+
+
+def _score(ratio, lo_hi: tuple[float, float]):
+    lo, hi = lo_hi
+    return np.clip((ratio - lo) / (hi - lo), 0.0, 1.0)
+
+
+def expression_features(face: np.ndarray) -> dict[str, float]:
+    """
+    Scale-free expression scores in 0..1 from face mesh landmarks: smile,
+    jaw_open, eyes_open and brow_raise. Distances are taken in the image
+    plane and divided by the face's own size, so they don't depend on how
+    far the child sits from the camera.
+    """
+    xy = face[:, :2].astype(np.float64)
+    face_width = np.linalg.norm(xy[CHEEK_LEFT] - xy[CHEEK_RIGHT])
+    face_height = np.linalg.norm(xy[FOREHEAD] - xy[CHIN])
+    if face_width == 0 or face_height == 0:
+        return {"smile": 0.0, "jaw_open": 0.0, "eyes_open": 0.0, "brow_raise": 0.0}
+
+    mouth_width = np.linalg.norm(xy[MOUTH_LEFT] - xy[MOUTH_RIGHT])
+    lip_gap = np.linalg.norm(xy[LIP_UPPER] - xy[LIP_LOWER])
+    eyes = xy[EYES]  # (2 eyes, 4 points, 2)
+    lid_gap = np.linalg.norm(eyes[:, 0] - eyes[:, 1], axis=1)
+    eye_width = np.linalg.norm(eyes[:, 2] - eyes[:, 3], axis=1)
+    brow_gap = np.linalg.norm(xy[BROWS] - eyes[:, 0], axis=1)
+
+    return {
+        "smile": round(float(_score(mouth_width / face_width, SMILE_RANGE)), 3),
+        "jaw_open": round(float(_score(lip_gap / face_height, JAW_OPEN_RANGE)), 3),
+        "eyes_open": round(float(_score((lid_gap / np.maximum(eye_width, 1e-6)).mean(), EYES_OPEN_RANGE)), 3),
+        "brow_raise": round(float(_score(brow_gap.mean() / face_height, BROW_RAISE_RANGE)), 3),
+    }
+
+
+def face_fields(face: FaceResult | None, models: frozenset[str]) -> dict:
+    """The face entries of a JSON result, for the models the session enabled."""
+    fields = {}
+    if FACE in models:
+        fields["face"] = face.landmarks.astype(np.float64).round(JSON_DECIMALS).tolist() if face is not None else []
+    if EXPRESSIONS in models:
+        fields["expressions"] = face.expressions if face is not None else None
+    return fields
@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+
+class LatestFrameSlot:
+    """
+    A single-slot mailbox between a session's receiver and its inference loop.
+
+    The receiver always overwrites the slot, so when inference falls behind the
+    client's send rate the stale frames are dropped (and counted) instead of
+    piling up in the socket. Latency stays bounded by one inference pass.
+    """
+
+    def __init__(self):
+        self._frame = None
+        self._received_at = 0.0
+        self._seq = 0
+        self._ready = asyncio.Event()
+        self._closed = False
+        self.received = 0
+        self.dropped = 0
+
+    def put(self, frame) -> bool:
+        """Stores a frame, returning True if it replaced an unprocessed one."""
+        replaced = self._frame is not None
+        if replaced:
+            self.dropped += 1
+        self._frame = frame
+        self._received_at = time.perf_counter()
+        self.received += 1
+        self._seq = self.received
+        self._ready.set()
+        return replaced
+
+    async def get(self):
+        """
+        Waits for the newest frame and returns (frame, received_at, seq), or
+        None once the slot is closed and empty. `seq` is the frame's 1-based
+        position in the order the client sent it.
+        """
+        while self._frame is None:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        frame, received_at, seq = self._frame, self._received_at, self._seq
+        self._frame = None
+        return frame, received_at, seq
+
+    def close(self):
+        self._closed = True
+        self._ready.set()
@@ -0,0 +1,86 @@
+import os
+from dataclasses import replace
+
+import cv2
+import numpy as np
+
+import metrics
+
+# --- Static-Scene Gate ---
+# Children often hold still between actions, and then consecutive frames are
+# near-identical. Before a frame is fully decoded, the gate decodes a 1/8
+# scale grayscale thumbnail (a JPEG can be decoded at that scale for a
+# fraction of the full cost) and compares it with the thumbnail of the last
+# frame that was actually tracked. If few enough pixels changed, the previous
+# results are reused and decode, colour conversion and inference are skipped.
+#
+# Comparing against the last *tracked* frame, not the last received one,
+# means slow drift still adds up to a change.
+#
+# The gate is off unless a session asks for it with `?gate=1` (or
+# STATIC_GATE_ENABLED=1 turns it on for every session), so clients get every
+# frame tracked by default. `&gate_threshold=` sets the changed-pixel fraction.
+GATE_ENABLED = os.environ.get("STATIC_GATE_ENABLED", "0") == "1"
+GATE_THRESHOLD = float(os.environ.get("STATIC_GATE_THRESHOLD", 0.002))
+# A thumbnail pixel counts as changed when it moved by more than this (0-255);
+# sensor noise is mostly averaged away at 1/8 scale
+PIXEL_DELTA = 12
+# Track at least every this many frames even in a static scene, so the
+# tracker's own state never goes stale
+MAX_REUSE = 30
+
+
+def jpeg_thumbnail(nparr: np.ndarray) -> np.ndarray | None:
+    """The 1/8 scale grayscale thumbnail of an encoded image, or None if it doesn't decode."""
+    return cv2.imdecode(nparr, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+
+
+class StaticSceneGate:
+    """Per-session change detector; only ever used on the session's worker thread."""
+
+    def __init__(self, threshold: float = GATE_THRESHOLD, max_reuse: int = MAX_REUSE):
+        self.threshold = threshold
+        self.max_reuse = max_reuse
+        self.reference = None
+        self.thumbnail = None
+        self.reused = 0
+        self.hand = None
+        self.face = None
+
+    @classmethod
+    def from_query(cls, params) -> "StaticSceneGate | None":
+        if params.get("gate", "1" if GATE_ENABLED else "0") == "0":
+            return None
+        try:
+            threshold = float(params.get("gate_threshold", GATE_THRESHOLD))
+        except ValueError:
+            raise ValueError("gate_threshold must be a number") from None
+        return cls(threshold) if threshold > 0 else None
+
+    def unchanged(self, thumbnail: np.ndarray | None) -> bool:
+        """
+        True if the frame with this thumbnail looks like the last tracked one
+        (its results can be reused).
+        """
+        self.thumbnail = thumbnail
+        if (self.thumbnail is None or self.reference is None or self.reused >= self.max_reuse
+                or self.thumbnail.shape != self.reference.shape):
+            return False
+        changed = np.count_nonzero(cv2.absdiff(self.thumbnail, self.reference) > PIXEL_DELTA)
+        if changed > self.threshold * self.thumbnail.size:
+            return False
+        self.reused += 1
+        metrics.REUSED_FRAMES.inc()
+        return True
+
+    def results(self):
+        """Copies of the last tracked results, safe for the caller to modify."""
+        hand = replace(self.hand) if self.hand is not None else None
+        return hand, self.face
+
+    def remember(self, hand, face):
+        """Stores the results of a frame that was tracked in full."""
+        self.reference = self.thumbnail
+        self.reused = 0
+        self.hand = replace(hand) if hand is not None else None
+        self.face = face
@@ -1,22 +1,318 @@
 import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
 import cv2
-import mediapipe as mp
 import numpy as np
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
+from starlette.datastructures import QueryParams
 from websockets.exceptions import ConnectionClosed
 
-# --- Basic FastAPI App Setup ---
-app = FastAPI()
+# Vision code shared with the desktop games lives in ml_services/common
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from common.drums import DrumEngine, load_layout
+from common.gestures import GESTURES, GestureRecognizer
+
+import metrics
+from face import (EXPRESSIONS, FACE, HANDS, FaceResult, expression_features, face_fields,
+                  face_from_results, parse_models)
+import mux
+from frame_slot import LatestFrameSlot
+from gate import StaticSceneGate, jpeg_thumbnail
+from mux import MuxWriter
+from qos import QosController, targets_from_query
+from roi import REDUCED_DECODE_FLAGS, RoiTracker
+from shm_transport import SHM_SOCKET_PATH, start_shm_server
+from smoothing import LandmarkSmoother
+from subscription import Subscription
+from tracker_pool import TrackerPool
+from video_ingest import StreamDecoder, StreamFrame, StreamOverflow, container_from_query
+from wire import FORMAT_JSON, FORMATS, encode_binary, encode_json, hand_from_results
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger("hand_tracking")
 
 # --- MediaPipe Hand Tracking Setup ---
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(
-    static_image_mode=False,
-    max_num_hands=1, # We only need to track one hand for our use case
-    min_detection_confidence=0.7,
-    min_tracking_confidence=0.7,
-)
-mp_drawing = mp.solutions.drawing_utils
+# Every session gets its own tracker, pinned to one of the pool's worker
+# threads; the pool (app.state.pool) lives as long as the app's lifespan.
+# Optional cap on concurrent sessions (0 = unlimited), reported to the backend's fleet router
+MAX_SESSIONS = int(os.environ.get("MAX_SESSIONS", 0))
+# Close code for sessions refused while draining or full ("try again later")
+TRY_AGAIN_LATER = 1013
+# Close code for video streams sent faster than they can be decoded (policy violation)
+TOO_FAST = 1008
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pool = app.state.pool = TrackerPool()
+    metrics.FPS.fn = lambda: round(sum(s.fps.fps for s in pool.sessions), 1)
+    metrics.DEGRADED_SESSIONS.fn = lambda: sum(1 for s in pool.sessions if s.quality > 0)
+    logger.info("Starting hand tracking pool with %d workers...", len(pool.workers))
+    # Optional zero-copy transport for a backend on the same host
+    shm_server = await start_shm_server(pool, SHM_SOCKET_PATH) if SHM_SOCKET_PATH else None
+    yield
+    logger.info("Shutting down hand tracking pool...")
+    if shm_server is not None:
+        shm_server.close()
+    pool.shutdown()
+
+# --- Basic FastAPI App Setup ---
+app = FastAPI(lifespan=lifespan)
+# A draining tracker keeps its current sessions but refuses new ones
+app.state.draining = False
+
+
+def track_frame(hands, image: bytes | StreamFrame, roi: RoiTracker | None = None, reduction: int = 1,
+                face_mesh=None, expressions: bool = False, gate: StaticSceneGate | None = None,
+                crop_hands=None):
+    """
+    Decodes one frame (JPEG bytes, or a frame of a /ws/stream video) and
+    runs it through the session's models: `hands` and/or `face_mesh`, both
+    on the same RGB buffer.
+    Runs on a pool worker thread, never on the event loop.
+    Returns (decoded, hand, face); hand and face are None if not found.
+    `reduction` decodes the frame at 1/2, 1/4 or 1/8 of its size.
+    With a `gate`, a frame that looks like the last tracked one gets that
+    frame's results again, without being decoded or tracked (see gate.py).
+    With a `roi`, `crop_hands` is the session's graph for crops.
+    """
+    timer = metrics.StageTimer()
+    if not isinstance(image, StreamFrame):
+        image = np.frombuffer(image, np.uint8)
+    if gate is not None:
+        unchanged = gate.unchanged(image.thumbnail() if isinstance(image, StreamFrame) else jpeg_thumbnail(image))
+        timer.lap(metrics.GATE)
+        if unchanged:
+            return (True, *gate.results())
+
+    decoded, hand, face = _track_frame(hands, image, timer, roi, reduction, face_mesh, expressions, crop_hands)
+    if gate is not None and decoded:
+        gate.remember(hand, face)
+    return decoded, hand, face
+
+
+def _track_frame(hands, image: np.ndarray | StreamFrame, timer: metrics.StageTimer,
+                 roi: RoiTracker | None, reduction: int, face_mesh, expressions: bool, crop_hands):
+    if isinstance(image, StreamFrame):
+        # Already decoded by the stream's decoder; scaled and converted in one pass
+        rgb_frame = image.to_rgb(reduction)
+    else:
+        # 1. Decode the image bytes into an OpenCV image
+        if roi is not None:
+            # ROI mode decodes and crops around the previous hand itself
+            decoded, hand = roi.track(hands, crop_hands, image, timer)
+            return decoded, hand, None
+        frame = cv2.imdecode(image, REDUCED_DECODE_FLAGS.get(reduction, cv2.IMREAD_COLOR))
+        timer.lap(metrics.DECODE)
+
+        if frame is None:
+            return False, None, None
+
+        # 2. Process the frame with MediaPipe
+        # Convert the BGR image to RGB
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    rgb_frame.flags.writeable = False # Improve performance
+    timer.lap(metrics.CONVERT)
+
+    hand = None
+    if hands is not None:
+        hand = hand_from_results(hands.process(rgb_frame))
+        timer.lap(metrics.INFERENCE)
+    face = None
+    if face_mesh is not None:
+        landmarks = face_from_results(face_mesh.process(rgb_frame))
+        timer.lap(metrics.FACE_INFERENCE)
+        if landmarks is not None:
+            face = FaceResult(landmarks, expression_features(landmarks) if expressions else None)
+    return True, hand, face
+
+
+async def receive_frames(websocket: WebSocket, slot: LatestFrameSlot):
+    """
+    Reads frames off the socket as fast as the client sends them, so that
+    only the newest one is waiting when the tracker is ready for it.
+    """
+    try:
+        while True:
+            if slot.put(await websocket.receive_bytes()):
+                metrics.DROPPED_FRAMES.inc()
+    finally:
+        slot.close()
+
+
+class SessionOptions:
+    """The per-session options a client picks in the /ws/track query string."""
+
+    def __init__(self, params):
+        self.fmt = params.get("format", FORMAT_JSON)
+        if self.fmt not in FORMATS:
+            raise ValueError(f"Unsupported format '{self.fmt}'")
+        self.send_header = params.get("header", "1") != "0"
+        self.roi = RoiTracker() if params.get("roi", "0") == "1" else None
+        self.models = parse_models(params.get("models"))
+        if self.models != {HANDS} and (self.roi is not None or self.fmt != FORMAT_JSON):
+            raise ValueError("Face models need the json format and full frames (no roi)")
+        try:
+            self.smoother = LandmarkSmoother.from_query(params)
+        except ValueError:
+            raise ValueError("infer_every must be an integer or 'auto'") from None
+        self.qos = targets_from_query(params)
+        self.gate = StaticSceneGate.from_query(params)
+        self.subscription = Subscription.from_query(params)
+        # `?game=drums` plays Magic Drums on the tracked landmarks (see common/drums.py)
+        self.drums = None
+        if params.get("game") == "drums":
+            self.drums = DrumEngine(load_layout(params.get("layout", "default")),
+                                    mirror=params.get("mirror", "1") != "0")
+        # `?gestures=1` (or a comma-separated list of them) reports gesture
+        # events (see common/gestures.py)
+        self.gestures = None
+        self.gesture_names = None
+        value = params.get("gestures", "0")
+        if value != "0":
+            names = set(GESTURES) if value == "1" else {g.strip() for g in value.split(",")}
+            if not names <= set(GESTURES):
+                raise ValueError(f"gestures must be 1 or a comma-separated subset of {', '.join(GESTURES)}")
+            self.gestures = GestureRecognizer(max_hands=1)
+            self.gesture_names = names
+
+
+def accepting_sessions() -> bool:
+    return not app.state.draining and not (MAX_SESSIONS and len(app.state.pool.sessions) >= MAX_SESSIONS)
+
+
+async def apply_quality(session, qos: QosController, smoother: LandmarkSmoother | None,
+                        requested: LandmarkSmoother | None, requested_every: int | None
+                        ) -> LandmarkSmoother | None:
+    """
+    Switches a session to its controller's current tier and returns the
+    smoother to use from now on. Tiers that skip frames need one. `requested`
+    is the smoother the client asked for, if any; one added for a lower tier
+    is dropped once the tier tracks every frame again, so a client that
+    never asked for smoothing gets raw landmarks back.
+    """
+    tier = qos.tier
+    session.quality = qos.level
+    metrics.QUALITY_CHANGES.inc()
+    logger.info("Session on worker %d moved to quality tier '%s'.", session.worker.index, tier.name)
+    await session.reconfigure(model_complexity=tier.model_complexity,
+                              min_tracking_confidence=tier.min_tracking_confidence)
+    # Adaptive cadence (infer_every=auto) already skips frames on its own
+    if requested_every is None:
+        return smoother
+    if requested is None and tier.infer_every == 1:
+        return None
+    smoother = smoother or LandmarkSmoother(every=1)
+    smoother.every = max(requested_every, tier.infer_every)
+    return smoother
+
+
+async def serve_session(slot: LatestFrameSlot, options: SessionOptions, send_text, send_bytes):
+    """
+    Tracks the frames arriving in `slot` until it is closed, answering each
+    one through `send_text` (JSON) or `send_bytes` (binary formats).
+    """
+    models = options.models
+    session = await app.state.pool.open_session(hands=HANDS in models, face=bool(models & {FACE, EXPRESSIONS}),
+                                                roi=options.roi is not None)
+    metrics.ACTIVE_SESSIONS.inc()
+    logger.info("Client connected to hand tracking service (worker %d, format %s, models %s).",
+                session.worker.index, options.fmt, ",".join(sorted(models)))
+    smoother = options.smoother
+    requested_every = smoother.every if smoother is not None else 1
+    qos = QosController(session.worker, *options.qos) if options.qos is not None else None
+    subscription = options.subscription
+    fields = subscription.fields if subscription is not None else "xyz"
+    # Frames answered by extrapolation reuse the last tracked face
+    face = None
+
+    try:
+        while True:
+            # Wait for the newest frame the client has sent
+            item = await slot.get()
+            if item is None:
+                break
+            image, received_at, frame_id = item
+
+            if smoother is not None and not smoother.should_infer(received_at):
+                # Skipped frame: extrapolate instead of decoding and tracking it
+                hand = smoother.predicted(received_at)
+                metrics.PREDICTED_FRAMES.inc()
+            else:
+                reduction = qos.tier.reduction if qos is not None else 1
+                decoded, hand, face = await session.run(track_frame, image, options.roi, reduction,
+                                                        session.face_mesh, EXPRESSIONS in models, options.gate,
+                                                        session.crop_hands)
+
+                if not decoded:
+                    metrics.UNDECODABLE_FRAMES.inc()
+                    logger.debug("Could not decode image.")
+                    continue
+                metrics.FRAMES.inc()
+                if smoother is not None:
+                    hand = smoother.measured(hand, received_at)
+
+            if qos is not None:
+                now = time.perf_counter()
+                if qos.observe(now - received_at, slot.dropped, now) is not None:
+                    smoother = await apply_quality(session, qos, smoother, options.smoother, requested_every)
+
+            if options.drums is not None:
+                # Scored on the full hand, before a subscription cuts it down
+                events = options.drums.update(hand.landmarks if hand is not None else None, received_at)
+                if events:
+                    await send_text(json.dumps({"drums": {
+                        "events": [{"kind": e.kind, "drum": e.drum} for e in events],
+                        "target": options.drums.target, "frame_id": frame_id}}))
+
+            if options.gestures is not None:
+                events = [e for e in options.gestures.update(hand.landmarks if hand is not None else None,
+                                                             received_at)
+                          if e.gesture in options.gesture_names]
+                if events:
+                    await send_text(json.dumps({"gestures": {
+                        "events": [{"kind": e.kind, "gesture": e.gesture} for e in events],
+                        "active": [g for g in options.gestures.gestures() if g in options.gesture_names],
+                        "frame_id": frame_id}}))
+
+            if subscription is not None:
+                send, hand = subscription.apply(hand, received_at)
+                if not send:
+                    metrics.SUPPRESSED_RESULTS.inc()
+                    continue
+
+            # 3. Send the landmarks (empty if no hand is detected) in the negotiated format
+            fps = round(session.fps.fps, 1)
+            timer = metrics.StageTimer()
+            if options.fmt == FORMAT_JSON:
+                latency_ms = round((time.perf_counter() - received_at) * 1000, 1)
+                quality = {"quality": qos.tier.name} if qos is not None else {}
+                message = encode_json(hand, fields, frame_id=frame_id, fps=fps, dropped=slot.dropped,
+                                      latency_ms=latency_ms,
+                                      predicted=hand is not None and hand.predicted, **quality,
+                                      **face_fields(face, models))
+                timer.lap(metrics.SERIALIZE)
+                await send_text(message)
+            else:
+                message = encode_binary(
+                    hand, options.fmt, frame_id=frame_id, dropped=slot.dropped, fps=fps,
+                    header=options.send_header, quality=session.quality
+                )
+                timer.lap(metrics.SERIALIZE)
+                await send_bytes(message)
+            timer.lap(metrics.SEND)
+    finally:
+        metrics.ACTIVE_SESSIONS.dec()
+        logger.info("Closing session after %d frames (%.1f fps average, %d dropped).",
+                    session.fps.frames, session.fps.average(), slot.dropped)
+        await session.close()
+
 
 # --- WebSocket Endpoint for Hand Tracking ---
 @app.websocket("/ws/track")
@@ -24,55 +320,243 @@ async def websocket_endpoint(websocket: WebSocket):
     """
     This WebSocket endpoint receives raw video frames (as bytes),
     processes them using MediaPipe Hand Tracking, and sends back
-    the detected landmark coordinates.
+    the detected landmark coordinates along with the session's fps.
+
+    Receiving runs separately from inference: if frames arrive faster
+    than they can be tracked, only the newest one is processed and the
+    rest are dropped. Every result reports the running dropped count and
+    the frame id, i.e. the 1-based position of the frame it answers in the
+    order the client sent them.
+
+    Clients pick the result format with `?format=`: "json" (default),
+    or the binary "f32" / "i16" formats described in wire.py. Binary
+    clients can pass `&header=0` to receive bare landmark arrays.
+
+    With `?roi=1`, inference runs on a downscaled crop around the previous
+    frame's hand instead of the full frame (see roi.py).
+
+    `?smooth=1` runs landmarks through a One-Euro filter. `?infer_every=N`
+    (or `auto`, which follows hand speed) also skips inference on all but
+    every Nth frame and extrapolates the rest; results carry a `predicted`
+    flag so clients can tell measured frames from predicted ones.
+
+    `?landmarks=`, `&fields=`, `&max_fps=` and `&threshold=` subscribe to
+    a subset of the landmarks, sent only when they change (see subscription.py).
+
+    With `?qos=1`, sessions adapt their model, decode size and cadence to
+    load (see qos.py) towards `&target_fps=` and `&target_latency_ms=`; JSON
+    results report the current `quality` tier, binary headers carry it in
+    the flags. Without it, sessions stay at full quality.
+
+    `?models=` picks the models run on each frame: any of hands (default),
+    face (468 face mesh landmarks, as `face`) and expressions (scores in
+    0..1, as `expressions`). All of them share one decode and colour
+    conversion, and come back in the same JSON message.
+
+    With `?gate=1`, frames that barely differ from the last tracked one
+    reuse its results (see gate.py); `&gate_threshold=` sets the
+    changed-pixel fraction that counts as a change.
+
+    `?game=drums` (with `&layout=` and `&mirror=0` for mirrored frames) also
+    plays Magic Drums on the session's landmarks; hits are sent as separate
+    {"drums": {"events": [...], "target": ..., "frame_id": ...}} text messages.
+
+    `?gestures=1`, or a list such as `?gestures=pointing,pinch`, sends the
+    start and end of each gesture as {"gestures": {"events": [...],
+    "active": [...], "frame_id": ...}} text messages (see common/gestures.py).
     """
+    try:
+        options = SessionOptions(websocket.query_params)
+    except ValueError as e:
+        await websocket.close(code=1003, reason=str(e))
+        return
+
     await websocket.accept()
-    print("Client connected to hand tracking service.")
-    
+    if not accepting_sessions():
+        await websocket.close(code=TRY_AGAIN_LATER, reason="Tracker is draining or full")
+        return
+
+    slot = LatestFrameSlot()
+    receiver = asyncio.create_task(receive_frames(websocket, slot))
+
+    try:
+        await serve_session(slot, options, websocket.send_text, websocket.send_bytes)
+        # Surface the receiver's disconnect (or error) to the handlers below
+        await receiver
+
+    except (WebSocketDisconnect, ConnectionClosed):
+        logger.info("Client disconnected.")
+    except Exception:
+        metrics.SESSION_ERRORS.inc()
+        logger.exception("An error occurred in a hand tracking session.")
+    finally:
+        receiver.cancel()
+
+
+async def receive_stream(websocket: WebSocket, decoder: StreamDecoder):
+    """Feeds the client's video stream to its decoder as the chunks arrive."""
     try:
         while True:
-            # Receive image data from the client
-            image_bytes = await websocket.receive_bytes()
-            
-            # 1. Decode the image bytes into an OpenCV image
-            nparr = np.frombuffer(image_bytes, np.uint8)
-            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if frame is None:
-                print("Could not decode image.")
-                continue
-
-            # 2. Process the frame with MediaPipe
-            # Convert the BGR image to RGB
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            rgb_frame.flags.writeable = False # Improve performance
-            
-            results = hands.process(rgb_frame)
-            
-            # 3. Extract and send landmarks if a hand is detected
-            landmarks_data = {"landmarks": []}
-            if results.multi_hand_landmarks:
-                hand_landmarks = results.multi_hand_landmarks[0] # Get the first hand
-                
-                # Create a list of all 21 landmark coordinates
-                landmarks_list = []
-                for landmark in hand_landmarks.landmark:
-                    landmarks_list.append({"x": landmark.x, "y": landmark.y, "z": landmark.z})
-                
-                landmarks_data["landmarks"] = landmarks_list
-
-            # Send the data back to the client as JSON
-            await websocket.send_json(landmarks_data)
+            decoder.feed(await websocket.receive_bytes())
+    finally:
+        decoder.close()
+
+
+@app.websocket("/ws/stream")
+async def stream_endpoint(websocket: WebSocket):
+    """
+    Like /ws/track, but the client sends one continuous encoded video stream
+    instead of a JPEG per frame, in binary messages of any size (see
+    video_ingest.py). `?container=` names its format: webm (default, e.g.
+    MediaRecorder with VP8), h264 (Annex-B), hevc, ivf or mpegts. Results
+    and the other options are the same as on /ws/track, except roi.
+    Frame ids count decoded frames.
+    """
+    try:
+        options = SessionOptions(websocket.query_params)
+        container = container_from_query(websocket.query_params)
+        if options.roi is not None:
+            raise ValueError("roi=1 is only available for JPEG frames on /ws/track")
+    except ValueError as e:
+        await websocket.close(code=1003, reason=str(e))
+        return
+
+    await websocket.accept()
+    if not accepting_sessions():
+        await websocket.close(code=TRY_AGAIN_LATER, reason="Tracker is draining or full")
+        return
+
+    loop = asyncio.get_running_loop()
+    slot = LatestFrameSlot()
+
+    def put(frame: StreamFrame):
+        if slot.put(frame):
+            metrics.DROPPED_FRAMES.inc()
+
+    decoder = StreamDecoder(container,
+                            lambda frame: loop.call_soon_threadsafe(put, frame),
+                            lambda: loop.call_soon_threadsafe(slot.close))
+    decoder.start()
+    receiver = asyncio.create_task(receive_stream(websocket, decoder))
+
+    try:
+        await serve_session(slot, options, websocket.send_text, websocket.send_bytes)
+        if receiver.done():
+            # Input that overflowed the decoder also cuts the stream short
+            await receiver
+        if decoder.error is not None:
+            logger.info("Could not decode video stream: %s", decoder.error)
+            await websocket.close(code=1003, reason="Could not decode the video stream")
+        # Surface the receiver's disconnect (or error) to the handlers below
+        await receiver
 
     except (WebSocketDisconnect, ConnectionClosed):
-        print("Client disconnected.")
-    except Exception as e:
-        print(f"An error occurred: {e}")
+        logger.info("Client disconnected.")
+    except StreamOverflow as e:
+        logger.info("Closing video stream: %s", e)
+        await websocket.close(code=TOO_FAST, reason="Video stream arrives faster than it can be decoded")
+    except Exception:
+        metrics.SESSION_ERRORS.inc()
+        logger.exception("An error occurred in a video stream session.")
     finally:
-        print("Closing connection.")
+        receiver.cancel()
+        decoder.close()
 
 
+@app.websocket("/ws/mux")
+async def mux_endpoint(websocket: WebSocket):
+    """
+    Carries many tracking sessions over one connection, for backends that
+    relay frames for lots of users (see mux.py for the framing). Each stream
+    is a /ws/track session with the options it was opened with.
+    """
+    await websocket.accept()
+    writer = MuxWriter(websocket)
+    streams = {}  # stream id -> (slot, task)
+    logger.info("Multiplexing client connected.")
+
+    async def run_stream(stream_id: int, slot: LatestFrameSlot, options: SessionOptions):
+        try:
+            await serve_session(
+                slot, options,
+                lambda message: writer.send(mux.TEXT, stream_id, message.encode()),
+                lambda message: writer.send(mux.BINARY, stream_id, message),
+            )
+        except (WebSocketDisconnect, ConnectionClosed):
+            pass
+        except Exception:
+            metrics.SESSION_ERRORS.inc()
+            logger.exception("An error occurred in a multiplexed tracking session.")
+            try:
+                await writer.close_stream(stream_id, 1011, "Internal error")
+            except (WebSocketDisconnect, ConnectionClosed, RuntimeError):
+                pass
+        finally:
+            if streams.get(stream_id, (None,))[0] is slot:
+                del streams[stream_id]
+
+    try:
+        while True:
+            message = await websocket.receive_bytes()
+            kind, stream_id = mux.HEADER.unpack_from(message)
+            payload = memoryview(message)[mux.HEADER.size:]
+
+            if kind == mux.FRAME:
+                stream = streams.get(stream_id)
+                if stream is not None and stream[0].put(payload):
+                    metrics.DROPPED_FRAMES.inc()
+            elif kind == mux.OPEN:
+                try:
+                    options = SessionOptions(QueryParams(bytes(payload).decode()))
+                except ValueError as e:
+                    await writer.close_stream(stream_id, 1003, str(e))
+                    continue
+                if not accepting_sessions():
+                    await writer.close_stream(stream_id, TRY_AGAIN_LATER, "Tracker is draining or full")
+                    continue
+                slot = LatestFrameSlot()
+                streams[stream_id] = (slot, asyncio.create_task(run_stream(stream_id, slot, options)))
+            elif kind == mux.CLOSE:
+                stream = streams.get(stream_id)
+                if stream is not None:
+                    stream[0].close()
+
+    except (WebSocketDisconnect, ConnectionClosed):
+        logger.info("Multiplexing client disconnected.")
+    except Exception:
+        metrics.SESSION_ERRORS.inc()
+        logger.exception("An error occurred on a multiplexed connection.")
+    finally:
+        tasks = [task for _, task in streams.values()]
+        for slot, task in streams.values():
+            slot.close()
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
 
 @app.get("/")
 def read_root():
-    return {"Status": "Hand Tracking Service is running"}
\ No newline at end of file
+    return {
+        "Status": "Hand Tracking Service is running",
+        "sessions": len(app.state.pool.sessions),
+        "capacity": MAX_SESSIONS,
+        "workers": len(app.state.pool.workers),
+        "draining": app.state.draining,
+    }
+
+
+@app.post("/admin/drain")
+def set_draining(enabled: bool = True):
+    """
+    Stops (or resumes) accepting new sessions, e.g. before a restart.
+    Backends route new sessions elsewhere once their health check sees it.
+    """
+    app.state.draining = enabled
+    logger.info("Draining %s.", "enabled" if enabled else "disabled")
+    return {"draining": app.state.draining}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    """Per-stage latency histograms, fps and session gauges, and frame counters."""
+    return metrics.registry.render()
@@ -0,0 +1,184 @@
+import bisect
+import os
+import threading
+import time
+
+# --- Metrics Configuration ---
+# With METRICS_ENABLED=0 every timing hook is a single flag check, so the
+# frame pipeline pays nothing when nobody is scraping /metrics.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+
+# Latency buckets in seconds, from 0.5 ms up to half a second.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5)
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+class Counter:
+    """A monotonically increasing count."""
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self.value += amount
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter",
+                f"{self.name} {self.value}"]
+
+
+class Gauge:
+    """A value that goes up and down, or is computed by `fn` at scrape time."""
+
+    def __init__(self, name: str, help: str, fn=None):
+        self.name = name
+        self.help = help
+        self.value = 0
+        self.fn = fn
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def render(self) -> list[str]:
+        value = self.fn() if self.fn is not None else self.value
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge",
+                f"{self.name} {value}"]
+
+
+class _HistogramSeries:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram:
+    """
+    A fixed-bucket histogram, optionally split by a single label.
+    Hot paths should look their series up once with `labels()` and keep it.
+    """
+
+    def __init__(self, name: str, help: str, label: str | None = None,
+                 buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = buckets
+        self._series: dict[str, _HistogramSeries] = {}
+
+    def labels(self, value: str = "") -> _HistogramSeries:
+        series = self._series.get(value)
+        if series is None:
+            series = self._series.setdefault(value, _HistogramSeries(self.buckets))
+        return series
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for value, series in sorted(self._series.items()):
+            labels = {self.label: value} if self.label else {}
+            cumulative = 0
+            for bound, count in zip(self.buckets, series.counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': bound})} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {series.count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {series.sum}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {series.count}")
+        return lines
+
+
+class Registry:
+    """Collects metrics and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class StageTimer:
+    """
+    Times consecutive pipeline stages of one frame. Each `lap()` records the
+    time since the previous lap into the given histogram series.
+    """
+    __slots__ = ("last",)
+
+    def __init__(self):
+        self.last = time.perf_counter() if METRICS_ENABLED else 0.0
+
+    def lap(self, series: _HistogramSeries):
+        if METRICS_ENABLED:
+            now = time.perf_counter()
+            series.observe(now - self.last)
+            self.last = now
+
+
+# --- Hand Tracking Service Metrics ---
+registry = Registry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    "hand_tracking_stage_seconds", "Time spent in each stage of the frame pipeline.", label="stage"))
+DECODE = STAGE_SECONDS.labels("decode")
+CONVERT = STAGE_SECONDS.labels("convert")
+INFERENCE = STAGE_SECONDS.labels("inference")
+GATE = STAGE_SECONDS.labels("gate")
+FACE_INFERENCE = STAGE_SECONDS.labels("face_inference")
+SERIALIZE = STAGE_SECONDS.labels("serialize")
+SEND = STAGE_SECONDS.labels("send")
+
+FRAMES = registry.register(Counter(
+    "hand_tracking_frames_total", "Frames run through the tracker."))
+PREDICTED_FRAMES = registry.register(Counter(
+    "hand_tracking_predicted_frames_total", "Frames answered by extrapolation instead of tracking."))
+DROPPED_FRAMES = registry.register(Counter(
+    "hand_tracking_dropped_frames_total", "Frames replaced by a newer one before they were tracked."))
+REUSED_FRAMES = registry.register(Counter(
+    "hand_tracking_reused_frames_total", "Frames answered with the previous results because the scene had not changed."))
+GATE_REUSE_RATIO = registry.register(Gauge(
+    "hand_tracking_gate_reuse_ratio", "Share of frames answered by the static-scene gate since startup.",
+    fn=lambda: round(REUSED_FRAMES.value / FRAMES.value, 3) if FRAMES.value else 0.0))
+UNDECODABLE_FRAMES = registry.register(Counter(
+    "hand_tracking_undecodable_frames_total", "Frames that could not be decoded as images."))
+SUPPRESSED_RESULTS = registry.register(Counter(
+    "hand_tracking_suppressed_results_total", "Results not sent because they were unchanged or over a client's max_fps."))
+SESSION_ERRORS = registry.register(Counter(
+    "hand_tracking_session_errors_total", "Sessions that ended with an unexpected error."))
+ACTIVE_SESSIONS = registry.register(Gauge(
+    "hand_tracking_active_sessions", "Tracking sessions currently connected (WebSocket and shared memory)."))
+FPS = registry.register(Gauge(
+    "hand_tracking_fps", "Combined tracked frames per second across all active sessions."))
+QUALITY_CHANGES = registry.register(Counter(
+    "hand_tracking_quality_changes_total", "Times a session's QoS controller moved it to another quality tier."))
+DEGRADED_SESSIONS = registry.register(Gauge(
+    "hand_tracking_degraded_sessions", "Sessions currently below the top quality tier."))
@@ -0,0 +1,44 @@
+import asyncio
+import struct
+
+from fastapi import WebSocket
+
+# --- Multiplexed Sessions ---
+# A backend relaying frames for many users can carry all of their sessions
+# over a few /ws/mux connections instead of opening a /ws/track socket per
+# user. Every message on the connection is binary: a HEADER (kind, stream id)
+# followed by a payload. Stream ids are chosen by the client and are only
+# meaningful within one connection.
+#
+#   client -> tracker  OPEN    /ws/track query string, e.g. b"format=f32&roi=1"
+#   client -> tracker  FRAME   encoded image bytes, as sent to /ws/track
+#   client -> tracker  CLOSE   (empty) ends the stream
+#   tracker -> client  TEXT    a JSON result, UTF-8 encoded
+#   tracker -> client  BINARY  a binary result (see wire.py)
+#   tracker -> client  CLOSED  CLOSE_CODE + UTF-8 reason; the tracker refused
+#                              or ended the stream, with WebSocket close codes
+#                              (1003 bad options, 1013 draining or full)
+HEADER = struct.Struct("<BI")
+CLOSE_CODE = struct.Struct("<H")
+
+OPEN = 1
+FRAME = 2
+CLOSE = 3
+TEXT = 4
+BINARY = 5
+CLOSED = 6
+
+
+class MuxWriter:
+    """Sends tagged messages for any number of streams over one WebSocket."""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self._lock = asyncio.Lock()
+
+    async def send(self, kind: int, stream_id: int, payload: bytes = b""):
+        async with self._lock:
+            await self.websocket.send_bytes(HEADER.pack(kind, stream_id) + payload)
+
+    async def close_stream(self, stream_id: int, code: int, reason: str = ""):
+        await self.send(CLOSED, stream_id, CLOSE_CODE.pack(code) + reason.encode())
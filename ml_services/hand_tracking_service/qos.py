@@ -0,0 +1,120 @@
+import os
+from dataclasses import dataclass
+
+# --- Quality of Service ---
+# Off unless a session asks for it with `?qos=1` (or QOS_ENABLED=1 turns it
+# on for every session), so clients get full-quality results by default.
+# Every session starts at the top tier. A controller per session checks every
+# QOS_INTERVAL seconds whether the session keeps up with its targets and how
+# busy its worker thread is (the worker is shared with other sessions, so this
+# is where service-wide load shows up):
+#
+#   falling behind (latency over target, or frames dropped while under the
+#   target fps)                    -> one tier down
+#   comfortably ahead (latency under half the target, no drops, worker under
+#   LOW_LOAD) for UPGRADE_AFTER intervals in a row -> one tier up
+#
+# Lower tiers trade accuracy for time: the lite model, a reduced JPEG decode,
+# a lower tracking confidence (so MediaPipe re-runs palm detection less
+# often) and inference on every Nth frame, with the rest extrapolated.
+QOS_ENABLED = os.environ.get("QOS_ENABLED", "0") == "1"
+TARGET_FPS = float(os.environ.get("QOS_TARGET_FPS", 15))
+TARGET_LATENCY_MS = float(os.environ.get("QOS_TARGET_LATENCY_MS", 100))
+QOS_INTERVAL = float(os.environ.get("QOS_INTERVAL", 2.0))
+# Worker busy fraction below which sessions may move back up
+LOW_LOAD = 0.6
+UPGRADE_AFTER = 3
+
+
+@dataclass(frozen=True)
+class QualityTier:
+    name: str
+    model_complexity: int
+    # JPEG decode reduction factor (1, 2, 4 or 8)
+    reduction: int
+    min_tracking_confidence: float
+    infer_every: int
+
+
+TIERS = (
+    QualityTier("high", 1, 1, 0.7, 1),
+    QualityTier("medium", 0, 1, 0.6, 1),
+    QualityTier("low", 0, 2, 0.5, 2),
+    QualityTier("minimum", 0, 4, 0.5, 3),
+)
+
+
+def targets_from_query(params) -> tuple[float, float] | None:
+    """
+    (target fps, target latency ms) for a session with `?qos=1`, or None
+    when QoS is off. `&target_fps=` and `&target_latency_ms=` override the
+    defaults.
+    """
+    if params.get("qos", "1" if QOS_ENABLED else "0") == "0":
+        return None
+    try:
+        return (float(params.get("target_fps", TARGET_FPS)),
+                float(params.get("target_latency_ms", TARGET_LATENCY_MS)))
+    except ValueError:
+        raise ValueError("target_fps and target_latency_ms must be numbers") from None
+
+
+class QosController:
+    """Picks one session's quality tier from its latency, frame rate and worker load."""
+
+    def __init__(self, worker, target_fps: float = TARGET_FPS,
+                 target_latency_ms: float = TARGET_LATENCY_MS, interval: float = QOS_INTERVAL):
+        self.worker = worker
+        self.target_fps = target_fps
+        self.target_latency = target_latency_ms / 1000
+        self.interval = interval
+        self.level = 0
+        self._good_intervals = 0
+        self._started = None
+
+    @property
+    def tier(self) -> QualityTier:
+        return TIERS[self.level]
+
+    def _start_interval(self, now: float, dropped: int):
+        self._started = now
+        self._frames = 0
+        self._latency = 0.0
+        self._dropped = dropped
+        self._busy = self.worker.busy_seconds
+
+    def observe(self, latency: float, dropped: int, now: float) -> QualityTier | None:
+        """
+        Records one answered frame (`latency` in seconds, `dropped` the
+        session's running count). Returns the new tier when it changes.
+        """
+        if self._started is None:
+            self._start_interval(now, dropped)
+        self._frames += 1
+        self._latency += latency
+        elapsed = now - self._started
+        if elapsed < self.interval:
+            return None
+
+        fps = self._frames / elapsed
+        mean_latency = self._latency / self._frames
+        dropping = dropped > self._dropped
+        load = (self.worker.busy_seconds - self._busy) / elapsed
+        self._start_interval(now, dropped)
+
+        level = self.level
+        if mean_latency > self.target_latency or (dropping and fps < self.target_fps):
+            self._good_intervals = 0
+            level = min(level + 1, len(TIERS) - 1)
+        elif mean_latency < self.target_latency / 2 and not dropping and load < LOW_LOAD:
+            self._good_intervals += 1
+            if self._good_intervals >= UPGRADE_AFTER:
+                self._good_intervals = 0
+                level = max(level - 1, 0)
+        else:
+            self._good_intervals = 0
+
+        if level == self.level:
+            return None
+        self.level = level
+        return self.tier
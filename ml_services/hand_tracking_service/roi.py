@@ -0,0 +1,145 @@
+import os
+
+import cv2
+import numpy as np
+
+from metrics import CONVERT, DECODE, INFERENCE, StageTimer
+from wire import hand_from_results
+
+# --- ROI Inference Configuration ---
+# Extra space around the previous frame's hand box, as a fraction of its size,
+# so that the hand is still inside the crop after moving between frames.
+ROI_MARGIN = float(os.environ.get("ROI_MARGIN", 0.6))
+# The crop is downscaled so its longest side is at most this many pixels.
+ROI_SIZE = int(os.environ.get("ROI_SIZE", 256))
+# Smallest crop (in full-frame pixels) worth running, to keep tiny boxes stable.
+ROI_MIN_SIDE = 96
+# JPEG decode reduction used for the full-frame search when the hand is lost.
+SEARCH_REDUCTION = int(os.environ.get("ROI_SEARCH_REDUCTION", 2))
+
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def hand_box(landmarks: np.ndarray) -> tuple[float, float, float, float]:
+    """Normalized (x0, y0, x1, y1) bounding box of a (21, 3) landmark array."""
+    x0, y0 = landmarks[:, :2].min(axis=0)
+    x1, y1 = landmarks[:, :2].max(axis=0)
+    return float(x0), float(y0), float(x1), float(y1)
+
+
+class RoiTracker:
+    """
+    Per-session region-of-interest state for hand inference.
+
+    While a hand is being tracked, only a square crop around the previous
+    frame's landmarks is colour-converted, downscaled and fed to MediaPipe.
+    When the hand is lost, the next frame is decoded at reduced resolution
+    and searched in full. Landmarks are always returned in full-frame
+    normalized coordinates.
+
+    Searches and crops run on separate graphs (`hands` and `crop_hands`), so
+    neither graph's landmark tracking carries over into images of the other
+    kind. The crop graph has lost the hand by the time a search starts; the
+    search graph is reset then, since it last saw the hand before the crops.
+    """
+
+    def __init__(self, margin: float = ROI_MARGIN, size: int = ROI_SIZE,
+                 search_reduction: int = SEARCH_REDUCTION):
+        self.margin = margin
+        self.size = size
+        self.search_reduction = search_reduction if search_reduction in REDUCED_DECODE_FLAGS else 1
+        self.box = None
+        # Full-frame (width, height) of the last decoded frame
+        self.frame_size = None
+        self._cropping = False
+
+    def track(self, hands, crop_hands, nparr: np.ndarray, timer: StageTimer):
+        """
+        Decodes and tracks one frame. Returns (decoded, hand) like track_frame.
+        """
+        if self.box is None:
+            if self._cropping:
+                hands.reset()
+                self._cropping = False
+            decoded, hand = self._search(hands, nparr, timer)
+        else:
+            self._cropping = True
+            decoded, hand = self._track_crop(crop_hands, nparr, timer)
+
+        if decoded:
+            self.box = hand_box(hand.landmarks) if hand is not None else None
+        return decoded, hand
+
+    def _search(self, hands, nparr: np.ndarray, timer: StageTimer):
+        # Full-frame search on a reduced decode. The image still covers the
+        # whole frame, so the landmarks need no remapping.
+        frame = cv2.imdecode(nparr, REDUCED_DECODE_FLAGS[self.search_reduction])
+        timer.lap(DECODE)
+        if frame is None:
+            return False, None
+        self.frame_size = (frame.shape[1] * self.search_reduction, frame.shape[0] * self.search_reduction)
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        rgb_frame.flags.writeable = False
+        timer.lap(CONVERT)
+        results = hands.process(rgb_frame)
+        timer.lap(INFERENCE)
+        return True, hand_from_results(results)
+
+    def _crop_side(self, w: int, h: int, min_side: float) -> int:
+        """Side in pixels of the square crop around the box, in a w x h image."""
+        x0, y0, x1, y1 = self.box
+        side = max((x1 - x0) * w, (y1 - y0) * h) * (1 + 2 * self.margin)
+        return int(min(max(side, min_side), w, h))
+
+    def _crop_reduction(self) -> int:
+        """
+        The largest JPEG decode reduction that still leaves the crop at least
+        `size` pixels across, judged by the previous frame's size. A hand
+        filling much of the frame then decodes at a fraction of the cost.
+        """
+        if self.frame_size is None:
+            return 1
+        side = self._crop_side(*self.frame_size, ROI_MIN_SIDE)
+        for reduction in (8, 4, 2):
+            if side / reduction >= self.size:
+                return reduction
+        return 1
+
+    def _track_crop(self, hands, nparr: np.ndarray, timer: StageTimer):
+        reduction = self._crop_reduction()
+        frame = cv2.imdecode(nparr, REDUCED_DECODE_FLAGS[reduction])
+        timer.lap(DECODE)
+        if frame is None:
+            return False, None
+        h, w = frame.shape[:2]
+        self.frame_size = (w * reduction, h * reduction)
+        x0, y0, x1, y1 = self.box
+
+        # Square crop around the previous box, pushed back inside the frame
+        side = self._crop_side(w, h, ROI_MIN_SIDE / reduction)
+        cx, cy = (x0 + x1) / 2 * w, (y0 + y1) / 2 * h
+        left = int(min(max(cx - side / 2, 0), w - side))
+        top = int(min(max(cy - side / 2, 0), h - side))
+
+        crop = frame[top:top + side, left:left + side]
+        if side > self.size:
+            crop = cv2.resize(crop, (self.size, self.size), interpolation=cv2.INTER_AREA)
+        rgb_crop = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+        rgb_crop.flags.writeable = False
+        timer.lap(CONVERT)
+
+        results = hands.process(rgb_crop)
+        timer.lap(INFERENCE)
+        hand = hand_from_results(results)
+        if hand is not None:
+            # Back to full-frame normalized coordinates. z shares x's scale.
+            landmarks = hand.landmarks
+            landmarks[:, 0] = (landmarks[:, 0] * side + left) / w
+            landmarks[:, 1] = (landmarks[:, 1] * side + top) / h
+            landmarks[:, 2] *= side / w
+        return True, hand
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import logging
+import os
+import struct
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import metrics
+from frame_slot import LatestFrameSlot
+from wire import FORMAT_F32, encode_binary, hand_from_results
+
+logger = logging.getLogger("hand_tracking.shm")
+
+# --- Shared-Memory Transport ---
+# For a backend running on the same host as the tracker. Instead of sending
+# JPEG bytes over a loopback WebSocket, the backend writes decoded RGB frames
+# into a shared-memory ring it owns and rings a doorbell on a Unix socket.
+# The tracker runs MediaPipe directly on the shared pixels (no copy, no
+# decode) and answers on the same socket with the binary f32 wire format.
+#
+# Protocol, per connection:
+#   client -> server  one JSON line: {"shm": name, "slots": n, "slot_bytes": size}
+#   client -> server  DOORBELL records: slot index, frame seq
+#   server -> client  u32 length + wire.encode_binary(..., FORMAT_F32) message
+#
+# Ring layout: `slots` consecutive slots of `slot_bytes` each. A slot starts
+# with SLOT_HEADER (seq, height, width) followed by height x width x 3 RGB
+# bytes. The writer fills the pixels first and the seq last; the reader
+# re-checks the seq after inference and discards frames overwritten meanwhile.
+SHM_SOCKET_PATH = os.environ.get("SHM_SOCKET_PATH")
+
+DOORBELL = struct.Struct("<II")
+SLOT_HEADER = struct.Struct("<IHH8x")
+LENGTH = struct.Struct("<I")
+
+
+class FrameRing:
+    """Read-side view of a client's shared-memory frame ring."""
+
+    def __init__(self, name: str, slots: int, slot_bytes: int):
+        self.shm = shared_memory.SharedMemory(name=name)
+        # The client owns the segment; don't let this process unlink it on exit.
+        resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        if slots * slot_bytes > self.shm.size:
+            self.shm.close()
+            raise ValueError("Shared-memory segment is smaller than the announced ring")
+
+    def seq(self, index: int) -> int:
+        return SLOT_HEADER.unpack_from(self.shm.buf, index * self.slot_bytes)[0]
+
+    def frame(self, index: int) -> np.ndarray:
+        """A read-only, zero-copy RGB view of the frame in slot `index`."""
+        offset = index * self.slot_bytes
+        _, height, width = SLOT_HEADER.unpack_from(self.shm.buf, offset)
+        view = np.ndarray((height, width, 3), dtype=np.uint8, buffer=self.shm.buf,
+                          offset=offset + SLOT_HEADER.size)
+        view.flags.writeable = False
+        return view
+
+    def close(self):
+        self.shm.close()
+
+
+def track_shared_frame(hands, ring: FrameRing, index: int, seq: int):
+    """
+    Runs the tracker directly on a frame in shared memory.
+    Returns (intact, hand); intact is False if the slot was overwritten.
+    """
+    if index >= ring.slots or ring.seq(index) != seq:
+        return False, None
+    timer = metrics.StageTimer()
+    frame = ring.frame(index)
+    results = hands.process(frame)
+    del frame
+    timer.lap(metrics.INFERENCE)
+    if ring.seq(index) != seq:
+        return False, None
+    return True, hand_from_results(results)
+
+
+async def _receive_doorbells(reader: asyncio.StreamReader, slot: LatestFrameSlot):
+    try:
+        while True:
+            if slot.put(DOORBELL.unpack(await reader.readexactly(DOORBELL.size))):
+                metrics.DROPPED_FRAMES.inc()
+    except asyncio.IncompleteReadError:
+        pass
+    finally:
+        slot.close()
+
+
+async def handle_shm_client(pool, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        hello = json.loads(await reader.readline())
+        ring = FrameRing(hello["shm"], int(hello["slots"]), int(hello["slot_bytes"]))
+    except (ValueError, KeyError, OSError) as e:
+        logger.warning("Rejected shared-memory client: %s", e)
+        writer.close()
+        return
+
+    session = await pool.open_session()
+    metrics.ACTIVE_SESSIONS.inc()
+    logger.info("Shared-memory client connected (ring %s, worker %d).", hello["shm"], session.worker.index)
+
+    slot = LatestFrameSlot()
+    receiver = asyncio.create_task(_receive_doorbells(reader, slot))
+    try:
+        while True:
+            item = await slot.get()
+            if item is None:
+                break
+            (index, seq), _, _ = item
+
+            intact, hand = await session.run(track_shared_frame, ring, index, seq)
+            if not intact:
+                metrics.DROPPED_FRAMES.inc()
+                continue
+            metrics.FRAMES.inc()
+
+            timer = metrics.StageTimer()
+            message = encode_binary(hand, FORMAT_F32, frame_id=seq, dropped=slot.dropped,
+                                    fps=round(session.fps.fps, 1))
+            timer.lap(metrics.SERIALIZE)
+            writer.write(LENGTH.pack(len(message)) + message)
+            await writer.drain()
+            timer.lap(metrics.SEND)
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    except Exception:
+        metrics.SESSION_ERRORS.inc()
+        logger.exception("An error occurred in a shared-memory session.")
+    finally:
+        receiver.cancel()
+        metrics.ACTIVE_SESSIONS.dec()
+        await session.close()
+        ring.close()
+        writer.close()
+        logger.info("Shared-memory client disconnected (ring %s).", hello["shm"])
+
+
+async def start_shm_server(pool, path: str) -> asyncio.AbstractServer:
+    """Listens for co-located clients on the Unix socket at `path`."""
+    if os.path.exists(path):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(
+        lambda reader, writer: handle_shm_client(pool, reader, writer), path=path
+    )
+    logger.info("Shared-memory transport listening on %s", path)
+    return server
@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+
+from common.filters import OneEuroFilter
+from wire import HandResult
+
+# --- Skip-Frame Configuration ---
+# In adaptive mode, inference runs on every frame while any landmark moves
+# faster than this (normalized units per second) and on every
+# ADAPTIVE_MAX_EVERY-th frame while the hand is nearly still.
+MOTION_THRESHOLD = float(os.environ.get("SKIP_MOTION_THRESHOLD", 0.6))
+ADAPTIVE_MAX_EVERY = int(os.environ.get("SKIP_ADAPTIVE_MAX_EVERY", 4))
+# Never extrapolate further than this from the last measured frame.
+MAX_PREDICT_SECONDS = 0.25
+
+
+class LandmarkSmoother:
+    """
+    Per-session landmark filtering and skip-frame scheduling.
+
+    Every measured hand goes through a One-Euro filter, which removes the
+    frame-to-frame jitter that makes gestures and hit zones flicker. With
+    `every` > 1 the tracker only runs on every Nth frame and the frames in
+    between are extrapolated from the filter; with `every=None` the cadence
+    adapts to how fast the hand is moving.
+    """
+
+    def __init__(self, every: int | None = 1, motion_threshold: float = MOTION_THRESHOLD,
+                 max_every: int = ADAPTIVE_MAX_EVERY):
+        self.every = every
+        self.motion_threshold = motion_threshold
+        self.max_every = max_every
+        self.filter = OneEuroFilter()
+        self.last = None
+        self.since_measured = 0
+
+    @classmethod
+    def from_query(cls, params) -> "LandmarkSmoother | None":
+        """
+        Builds a smoother from `?smooth=1` and/or `?infer_every=N|auto`,
+        or returns None when the session wants raw landmarks.
+        """
+        infer_every = params.get("infer_every")
+        if infer_every == "auto":
+            return cls(every=None)
+        if infer_every is not None:
+            return cls(every=max(1, int(infer_every)))
+        if params.get("smooth", "0") == "1":
+            return cls(every=1)
+        return None
+
+    def should_infer(self, t: float) -> bool:
+        if self.last is None or t - self.filter.t > MAX_PREDICT_SECONDS:
+            return True
+        every = self.every
+        if every is None:
+            speed = float(np.abs(self.filter.dx[:, :2]).max())
+            every = 1 if speed > self.motion_threshold else self.max_every
+        return self.since_measured + 1 >= every
+
+    def measured(self, hand: HandResult | None, t: float) -> HandResult | None:
+        """Filters a freshly tracked hand. A lost hand resets the filter."""
+        self.since_measured = 0
+        if hand is None:
+            self.filter.reset()
+            self.last = None
+            return None
+        hand.landmarks = self.filter(hand.landmarks, t)
+        self.last = hand
+        return hand
+
+    def predicted(self, t: float) -> HandResult | None:
+        """Extrapolates the last measured hand to time `t`."""
+        self.since_measured += 1
+        if self.last is None:
+            return None
+        return HandResult(self.filter.predict(t), self.last.handedness, self.last.score, predicted=True)
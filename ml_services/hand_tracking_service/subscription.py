@@ -0,0 +1,77 @@
+from dataclasses import replace
+
+import numpy as np
+
+from wire import NUM_LANDMARKS, HandResult
+
+# --- Landmark Subscriptions ---
+# Most games only look at a few landmarks: Magic Canvas follows landmarks
+# 6, 8, 10 and 12, and Magic Drums the index and middle fingertips (8, 12).
+# A client can ask for just what it uses when it connects:
+#
+#   ?landmarks=8,12   landmark indices, sent in this order (default: all 21)
+#   &fields=xy        coordinates per landmark, any of x, y, z (default: xyz)
+#   &max_fps=15       send at most this many results per second
+#   &threshold=0.005  only send when a value moved more than this
+#                     (normalized units) since the last result sent
+#
+# Results then carry only those values, in JSON and in the binary formats.
+# The first result is always sent, and so is every result where the hand
+# appears or disappears.
+FIELDS = "xyz"
+_NOTHING_SENT = object()
+
+
+class Subscription:
+    """Cuts results down to the landmarks and fields a client subscribed to."""
+
+    def __init__(self, indices=None, fields: str = FIELDS, max_fps: float = 0.0,
+                 threshold: float = 0.0):
+        self.indices = np.arange(NUM_LANDMARKS) if indices is None else np.asarray(indices, dtype=np.intp)
+        if self.indices.size == 0 or self.indices.min() < 0 or self.indices.max() >= NUM_LANDMARKS:
+            raise ValueError(f"landmarks must be indices from 0 to {NUM_LANDMARKS - 1}")
+        if not fields or any(f not in FIELDS for f in fields):
+            raise ValueError("fields must be a combination of x, y and z")
+        # Coordinates keep their x, y, z order whatever order they were asked in
+        self.fields = "".join(f for f in FIELDS if f in fields)
+        self.columns = np.array([FIELDS.index(f) for f in self.fields], dtype=np.intp)
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.threshold = threshold
+        self._selector = np.ix_(self.indices, self.columns)
+        self._last = _NOTHING_SENT
+        self._sent_at = float("-inf")
+
+    @classmethod
+    def from_query(cls, params) -> "Subscription | None":
+        """Builds a subscription from the query string, or None if there is none."""
+        if not any(key in params for key in ("landmarks", "fields", "max_fps", "threshold")):
+            return None
+        landmarks = params.get("landmarks")
+        try:
+            indices = [int(i) for i in landmarks.split(",")] if landmarks else None
+            max_fps = float(params.get("max_fps", 0))
+            threshold = float(params.get("threshold", 0))
+        except ValueError:
+            raise ValueError("landmarks must be comma-separated integers, max_fps and threshold numbers") from None
+        return cls(indices, params.get("fields", FIELDS), max_fps, threshold)
+
+    def apply(self, hand: HandResult | None, t: float) -> tuple[bool, HandResult | None]:
+        """
+        Returns (send, hand), with the hand cut down to the subscribed values
+        and `send` False when the result should be skipped.
+        """
+        if hand is not None:
+            hand = replace(hand, landmarks=hand.landmarks[self._selector])
+        if not self._changed(hand, t):
+            return False, hand
+        self._last = hand
+        self._sent_at = t
+        return True, hand
+
+    def _changed(self, hand: HandResult | None, t: float) -> bool:
+        last = self._last
+        if last is _NOTHING_SENT or (hand is None) != (last is None):
+            return True
+        if hand is None or t - self._sent_at < self.min_interval:
+            return False
+        return float(np.abs(hand.landmarks - last.landmarks).max()) > self.threshold
@@ -0,0 +1,189 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mediapipe as mp
+
+from face import FACE_MESH_OPTIONS
+
+# --- Pool Configuration ---
+# One inference thread per core by default. MediaPipe releases the GIL while
+# its graph runs (and so does OpenCV while decoding), so worker threads run
+# in parallel instead of taking turns on the event loop.
+TRACKER_WORKERS = int(os.environ.get("TRACKER_WORKERS", os.cpu_count() or 1))
+# How many frames may be waiting for a single worker before callers have to wait.
+INFERENCE_QUEUE_SIZE = int(os.environ.get("INFERENCE_QUEUE_SIZE", 4))
+
+mp_hands = mp.solutions.hands
+mp_face_mesh = mp.solutions.face_mesh
+
+HANDS_OPTIONS = {
+    "static_image_mode": False,
+    "max_num_hands": 1,  # We only need to track one hand for our use case
+    "model_complexity": 1,  # Full model; sessions under load may switch to lite (see qos.py)
+    "min_detection_confidence": 0.7,
+    "min_tracking_confidence": 0.7,
+}
+
+
+class FpsCounter:
+    """
+    Tracks the frame rate of a single session, both as a smoothed
+    instantaneous value and as the average over the whole session.
+    """
+
+    def __init__(self, alpha: float = 0.1):
+        self.alpha = alpha
+        self.fps = 0.0
+        self.frames = 0
+        self.started = time.perf_counter()
+        self._last = None
+
+    def tick(self):
+        now = time.perf_counter()
+        if self._last is not None and now > self._last:
+            instant = 1.0 / (now - self._last)
+            if self.frames == 1:
+                self.fps = instant
+            else:
+                self.fps += self.alpha * (instant - self.fps)
+        self._last = now
+        self.frames += 1
+
+    def average(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return self.frames / elapsed if elapsed > 0 else 0.0
+
+
+class TrackerWorker:
+    """
+    A single inference thread. Every session pinned to this worker runs its
+    frames here, so a session's `Hands` graph is only ever touched by one thread.
+    """
+
+    def __init__(self, index: int, queue_size: int):
+        self.index = index
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"tracker-{index}")
+        self.slots = asyncio.Semaphore(queue_size)
+        self.sessions = 0
+        # Time spent running frames, for the QoS controllers' load estimate
+        self.busy_seconds = 0.0
+
+    def timed(self, fn, *args):
+        """Runs `fn(*args)` on the worker thread, counting its run time as busy."""
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.busy_seconds += time.perf_counter() - start
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+class TrackerSession:
+    """
+    The tracker owned by one WebSocket connection. It holds its own MediaPipe
+    `Hands` instance, so the temporal tracking state is never shared between children.
+    Sessions that asked for face models also own a `FaceMesh` (`face_mesh`);
+    sessions without hand tracking have no `Hands` (`hands_options` is None).
+    ROI sessions own a second `Hands` for their crops (`crop_hands`, see roi.py).
+    """
+
+    def __init__(self, pool: "TrackerPool", worker: TrackerWorker, hands_options: dict | None,
+                 face: bool = False, roi: bool = False):
+        self.pool = pool
+        self.worker = worker
+        self.hands_options = hands_options
+        self.face = face
+        self.roi = roi
+        self.face_mesh = None
+        self.crop_hands = None
+        self.fps = FpsCounter()
+        # Index into qos.TIERS of the session's current quality
+        self.quality = 0
+        self._hands = None
+
+    async def _submit(self, fn, *args):
+        # The semaphore bounds the number of frames queued on this worker.
+        async with self.worker.slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.worker.executor, self.worker.timed, fn, *args)
+
+    async def start(self):
+        # Build the graphs on the worker thread that will run them.
+        if self.hands_options is not None:
+            self._hands = await self._submit(lambda: mp_hands.Hands(**self.hands_options))
+            if self.roi:
+                self.crop_hands = await self._submit(lambda: mp_hands.Hands(**self.hands_options))
+        if self.face:
+            self.face_mesh = await self._submit(lambda: mp_face_mesh.FaceMesh(**FACE_MESH_OPTIONS))
+
+    async def reconfigure(self, **hands_options):
+        """Rebuilds the tracker with changed options, e.g. a lighter model."""
+        if self.hands_options is None:
+            return
+        options = {**self.hands_options, **hands_options}
+        if options == self.hands_options:
+            return
+
+        def rebuild(graph):
+            graph.close()
+            return mp_hands.Hands(**options)
+
+        self._hands = await self._submit(rebuild, self._hands)
+        if self.crop_hands is not None:
+            self.crop_hands = await self._submit(rebuild, self.crop_hands)
+        self.hands_options = options
+
+    async def run(self, fn, *args):
+        """
+        Runs `fn(hands, *args)` on this session's worker thread and counts
+        the call towards the session's frame rate.
+        """
+        result = await self._submit(fn, self._hands, *args)
+        self.fps.tick()
+        return result
+
+    async def close(self):
+        if self._hands is not None:
+            await self._submit(self._hands.close)
+            self._hands = None
+        if self.crop_hands is not None:
+            await self._submit(self.crop_hands.close)
+            self.crop_hands = None
+        if self.face_mesh is not None:
+            await self._submit(self.face_mesh.close)
+            self.face_mesh = None
+        self.worker.sessions -= 1
+        self.pool.sessions.discard(self)
+
+
+class TrackerPool:
+    """
+    A fixed set of inference workers. New sessions are pinned to the worker
+    with the fewest sessions, so load spreads evenly across cores.
+    """
+
+    def __init__(self, workers: int = TRACKER_WORKERS, queue_size: int = INFERENCE_QUEUE_SIZE):
+        self.workers = [TrackerWorker(i, queue_size) for i in range(max(1, workers))]
+        self.sessions = set()
+
+    async def open_session(self, hands: bool = True, face: bool = False, roi: bool = False,
+                           **hands_options) -> TrackerSession:
+        worker = min(self.workers, key=lambda w: w.sessions)
+        worker.sessions += 1
+        session = TrackerSession(self, worker, {**HANDS_OPTIONS, **hands_options} if hands else None,
+                                 face, roi)
+        try:
+            await session.start()
+        except Exception:
+            worker.sessions -= 1
+            raise
+        self.sessions.add(session)
+        return session
+
+    def shutdown(self):
+        for worker in self.workers:
+            worker.shutdown()
@@ -0,0 +1,156 @@
+import os
+import threading
+from collections import deque
+
+import av
+import numpy as np
+
+# --- Encoded Video Stream Ingest ---
+# /ws/track takes one JPEG per message, so every frame is encoded on its own
+# by the client and decoded on its own here. /ws/stream instead takes one
+# continuous encoded video stream, split across as many binary messages as
+# the client likes: e.g. MediaRecorder's WebM (VP8) chunks, or H.264 Annex-B
+# straight from a hardware encoder. Inter-frame compression makes this far
+# smaller than per-frame JPEG for the same picture.
+#
+# Each session gets a decoder thread that demuxes and decodes the stream as
+# it arrives. Every frame has to be decoded (later frames depend on it), but
+# only the newest one is handed to the tracker, and only that one is ever
+# scaled and converted to RGB, in a single swscale pass on the worker thread.
+CONTAINERS = {
+    "h264": "h264",
+    "hevc": "hevc",
+    "webm": "matroska",
+    "matroska": "matroska",
+    "ivf": "ivf",
+    "mpegts": "mpegts",
+}
+# Start decoding as soon as the first frame is in, instead of buffering
+# input to probe the stream (the default probe held back ~50 frames of H.264).
+# No "nobuffer": it discards the frames read while probing.
+DEMUX_OPTIONS = {"probesize": "32", "analyzeduration": "0"}
+# Scale of the grayscale thumbnail compared by the static-scene gate
+THUMBNAIL_REDUCTION = 8
+# Encoded input waiting for the decoder. Compressed video can't skip ahead
+# the way latest-frame-wins drops whole frames, so a client that keeps
+# sending faster than its stream decodes is closed once this much (several
+# seconds of typical webcam video) has piled up.
+MAX_BUFFERED_BYTES = int(os.environ.get("STREAM_MAX_BUFFERED_BYTES", 1 << 20))
+
+
+class StreamOverflow(Exception):
+    """The client's stream arrived faster than it could be decoded."""
+
+
+def container_from_query(params) -> str:
+    name = params.get("container", "webm")
+    if name not in CONTAINERS:
+        raise ValueError(f"container must be one of {', '.join(CONTAINERS)}")
+    return CONTAINERS[name]
+
+
+class StreamFrame:
+    """A decoded frame waiting to be tracked; nothing is converted unless it is."""
+
+    __slots__ = ("frame",)
+
+    def __init__(self, frame: av.VideoFrame):
+        self.frame = frame
+
+    def to_rgb(self, reduction: int = 1) -> np.ndarray:
+        frame = self.frame
+        if reduction > 1:
+            return frame.to_ndarray(width=max(1, frame.width // reduction),
+                                    height=max(1, frame.height // reduction), format="rgb24")
+        return frame.to_ndarray(format="rgb24")
+
+    def thumbnail(self) -> np.ndarray:
+        frame = self.frame
+        return frame.to_ndarray(width=max(1, frame.width // THUMBNAIL_REDUCTION),
+                                height=max(1, frame.height // THUMBNAIL_REDUCTION), format="gray")
+
+
+class StreamPipe:
+    """
+    A blocking, read-only file for the demuxer, fed chunk by chunk from the
+    event loop. Reads wait for data; after `close` they drain and then hit EOF.
+    Holds at most `max_bytes` of unread input.
+    """
+
+    def __init__(self, max_bytes: int = MAX_BUFFERED_BYTES):
+        self.max_bytes = max_bytes
+        self._chunks = deque()
+        self._buffered = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def feed(self, data: bytes):
+        """
+        Queues a chunk for the demuxer (kept as is, not copied). Raises
+        StreamOverflow, dropping everything unread and ending the stream,
+        if it would go over `max_bytes`.
+        """
+        with self._cond:
+            if self._buffered + len(data) > self.max_bytes:
+                self._chunks.clear()
+                self._buffered = 0
+                self._closed = True
+                self._cond.notify()
+                raise StreamOverflow(f"More than {self.max_bytes} bytes of video waiting to be decoded")
+            self._chunks.append(data)
+            self._buffered += len(data)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def read(self, size: int = -1) -> bytes:
+        with self._cond:
+            self._cond.wait_for(lambda: self._chunks or self._closed)
+            if not self._chunks:
+                return b""
+            chunk = self._chunks.popleft()
+            if 0 <= size < len(chunk):
+                self._chunks.appendleft(chunk[size:])
+                chunk = chunk[:size]
+            self._buffered -= len(chunk)
+            return chunk
+
+
+class StreamDecoder:
+    """
+    Decodes one session's stream on its own thread, passing every frame to
+    `on_frame` and calling `on_end` once the stream ends or fails to decode.
+    Both callbacks run on the decoder thread.
+    """
+
+    def __init__(self, container: str, on_frame, on_end):
+        self.container = container
+        self.on_frame = on_frame
+        self.on_end = on_end
+        self.pipe = StreamPipe()
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name="stream-decoder", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def feed(self, data: bytes):
+        self.pipe.feed(data)
+
+    def close(self):
+        self.pipe.close()
+
+    def _run(self):
+        try:
+            with av.open(self.pipe, mode="r", format=self.container, options=DEMUX_OPTIONS) as container:
+                stream = container.streams.video[0]
+                for frame in container.decode(stream):
+                    self.on_frame(StreamFrame(frame))
+        except (av.FFmpegError, IndexError) as e:
+            # IndexError: the stream had no video track
+            self.error = e
+        finally:
+            self.on_end()
@@ -0,0 +1,118 @@
+import json
+import struct
+from dataclasses import dataclass
+
+import numpy as np
+
+# --- Wire Formats for /ws/track ---
+# "json" is the original format and stays the default for old clients.
+# "f32" and "i16" are binary: an optional fixed header followed by the
+# 21 x 3 landmark coordinates as little-endian float32 or int16. Sessions
+# with a subscription (see subscription.py) get only the subscribed landmarks
+# and coordinates, in subscription order, in every format.
+FORMAT_JSON = "json"
+FORMAT_F32 = "f32"
+FORMAT_I16 = "i16"
+FORMATS = (FORMAT_JSON, FORMAT_F32, FORMAT_I16)
+
+NUM_LANDMARKS = 21
+
+# int16 values are coordinates multiplied by this scale, i.e. a resolution of
+# 1e-4 in normalized units (well under a pixel even on a 4K frame).
+INT16_SCALE = 10000.0
+
+# JSON coordinates are rounded to this many decimals. Full float32 precision is
+# noise at this scale, and the shorter numbers are much cheaper to format.
+JSON_DECIMALS = 6
+
+WIRE_VERSION = 2
+# version, dtype, handedness, flags, frame id, dropped frames, score, fps
+HEADER = struct.Struct("<BBBBIIff")
+
+DTYPE_CODES = {FORMAT_F32: 0, FORMAT_I16: 1}
+HANDEDNESS_CODES = {None: 0, "Left": 1, "Right": 2}
+FLAG_HAND_PRESENT = 0x01
+FLAG_PREDICTED = 0x02
+# Bits 2-3 of the flags carry the session's quality tier (index into qos.TIERS)
+QUALITY_SHIFT = 2
+QUALITY_MASK = 0x0C
+
+
+@dataclass
+class HandResult:
+    """
+    The first detected hand of a frame, as a (21, 3) float32 array (fewer
+    rows or columns once cut down to a subscription).
+    `predicted` marks landmarks extrapolated on a frame that was not tracked.
+    """
+    landmarks: np.ndarray
+    handedness: str | None = None
+    score: float = 0.0
+    predicted: bool = False
+
+
+def hand_from_results(results) -> HandResult | None:
+    """
+    Pulls the first hand out of a MediaPipe result straight into a NumPy
+    array, without building a dict per landmark.
+    """
+    if not results.multi_hand_landmarks:
+        return None
+
+    landmarks = results.multi_hand_landmarks[0].landmark
+    coords = np.fromiter(
+        (value for lm in landmarks for value in (lm.x, lm.y, lm.z)),
+        dtype=np.float32,
+        count=NUM_LANDMARKS * 3,
+    ).reshape(NUM_LANDMARKS, 3)
+
+    handedness, score = None, 0.0
+    if results.multi_handedness:
+        classification = results.multi_handedness[0].classification[0]
+        handedness, score = classification.label, classification.score
+
+    return HandResult(coords, handedness, score)
+
+
+def encode_json(hand: HandResult | None, fields: str = "xyz", **extra) -> str:
+    """
+    The original {"landmarks": [{"x", "y", "z"}, ...]} message. `fields`
+    names the landmark columns when a subscription dropped some of them.
+    """
+    landmarks = []
+    if hand is not None:
+        coords = hand.landmarks.astype(np.float64).round(JSON_DECIMALS).tolist()
+        if fields == "xyz":
+            landmarks = [{"x": x, "y": y, "z": z} for x, y, z in coords]
+        else:
+            landmarks = [dict(zip(fields, row)) for row in coords]
+    return json.dumps({"landmarks": landmarks, **extra}, separators=(",", ":"))
+
+
+def encode_binary(hand: HandResult | None, fmt: str, frame_id: int = 0, dropped: int = 0,
+                  fps: float = 0.0, header: bool = True, quality: int = 0) -> bytes:
+    """
+    Packs a frame result for the binary formats. Without a header, a frame
+    with no hand is sent as an empty message.
+    """
+    if hand is None:
+        body = b""
+    elif fmt == FORMAT_I16:
+        quantized = np.clip(np.rint(hand.landmarks * INT16_SCALE), -32768, 32767)
+        body = quantized.astype("<i2").tobytes()
+    else:
+        body = hand.landmarks.astype("<f4", copy=False).tobytes()
+
+    if not header:
+        return body
+
+    flags = (quality << QUALITY_SHIFT) & QUALITY_MASK
+    if hand is not None:
+        flags |= FLAG_HAND_PRESENT
+        if hand.predicted:
+            flags |= FLAG_PREDICTED
+    handedness = HANDEDNESS_CODES.get(hand.handedness, 0) if hand is not None else 0
+    score = hand.score if hand is not None else 0.0
+    head = HEADER.pack(WIRE_VERSION, DTYPE_CODES[fmt], handedness, flags,
+                       frame_id & 0xFFFFFFFF, dropped & 0xFFFFFFFF, score, fps)
+    return head + body
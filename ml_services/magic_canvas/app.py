@@ -1,15 +1,21 @@
+import os
+import sys
 import cv2
 import mediapipe as mp
 import numpy as np
 import time
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.filters import OneEuroFilter, landmark_array
+from common.gestures import OPEN_PALM, POINTING, START, TWO_FINGERS, GestureRecognizer
+from common.pipeline import Pipeline, camera_settings
+from common.strokes import Stroke, decode_strokes, encode_strokes, rasterize
+
 mp_hands = mp.solutions.hands
 hands = mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.7)
-cap = cv2.VideoCapture(0)
 
-ret, frame = cap.read()
-h, w, _ = frame.shape
-canvas = np.ones((h, w, 3), dtype="uint8") * 255
+# Allocated at the camera's resolution on the first frame
+canvas = None
 
 colors = [(0,0,0), (0,0,255), (0,255,0), (255,0,0), (0,255,255), (255,0,255)]
 color_names = ["Black","Red","Green","Blue","Yellow","Magenta"]
@@ -21,12 +27,64 @@ selected_brush = brush_sizes[1]
 
 extra_buttons = ["Save","Clear"]
 
+# The eraser is a stroke too, painted in the background colour
+ERASER_COLOR = (255, 255, 255)
+ERASER_SIZE = 60
+
 prev_x, prev_y = 0, 0
 drawing = False
 
-def draw_toolbar(img, selected_color_idx, selected_brush_idx):
-    h, w, _ = img.shape
-    toolbar_height = int(h * 0.08)
+# The drawing as vector strokes; the canvas is only its on-screen raster.
+# Save writes them to DRAWING_PATH, and the next run opens it again.
+DRAWING_PATH = "drawing.strokes"
+strokes = []
+current_stroke = None
+
+def open_drawing(canvas):
+    """Redraws the saved drawing, if there is one, onto a new canvas."""
+    if not os.path.exists(DRAWING_PATH):
+        return
+    with open(DRAWING_PATH, "rb") as f:
+        _, _, saved = decode_strokes(f.read())
+    strokes.extend(saved)
+    rasterize(saved, canvas)
+
+def continue_stroke(color, size, x, y):
+    global current_stroke
+    if current_stroke is None or current_stroke.color != color or current_stroke.size != size:
+        end_stroke()
+        current_stroke = Stroke(color, size)
+        strokes.append(current_stroke)
+    current_stroke.add(x, y)
+
+def end_stroke():
+    global current_stroke
+    if current_stroke is not None:
+        current_stroke.finish()
+        current_stroke = None
+
+# Smooths fingertip jitter so the drawing gesture doesn't flicker on and off
+landmark_filter = OneEuroFilter()
+
+# Pointing draws, two fingers erase, and an open palm clears the canvas
+# (see common/gestures.py)
+gestures = GestureRecognizer(max_hands=1)
+
+def clear_canvas(event):
+    global canvas_dirty, current_stroke, prev_x, prev_y, drawing
+    if event.kind != START or canvas is None:
+        return
+    canvas[:] = 255
+    canvas_dirty = True
+    strokes.clear()
+    current_stroke = None
+    prev_x, prev_y = 0,0
+    drawing = False
+
+gestures.subscribe(clear_canvas, [OPEN_PALM])
+
+def draw_toolbar(img, selected_color_idx, selected_brush_idx, toolbar_height):
+    w = img.shape[1]
     total_buttons = len(colors) + len(brush_sizes) + len(extra_buttons)
     btn_width = w // total_buttons
 
@@ -58,29 +116,70 @@ def draw_toolbar(img, selected_color_idx, selected_brush_idx):
         cv2.putText(img, name, (x1+10,y1+toolbar_height-15),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,255,255), 2)
 
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
-    frame = cv2.flip(frame, 1)
+# --- Rendering ---
+# The toolbar only changes with the selection, so each selection is drawn once
+# and pasted over the top of the overlay; only the rest of the overlay is
+# blended with the camera, straight into a buffer reused every frame. The
+# "Canvas" window is only refreshed when something was drawn on it.
+toolbar_cache = {}
+overlay = None
+canvas_dirty = True
+render_ms = 0.0
+
+def toolbar_image(w, toolbar_height, selected_color_idx, selected_brush_idx):
+    key = (w, toolbar_height, selected_color_idx, selected_brush_idx)
+    image = toolbar_cache.get(key)
+    if image is None:
+        total_buttons = len(colors) + len(brush_sizes) + len(extra_buttons)
+        image = np.zeros((toolbar_height, (w // total_buttons) * total_buttons, 3), dtype="uint8")
+        draw_toolbar(image, selected_color_idx, selected_brush_idx, toolbar_height)
+        toolbar_cache[key] = image
+    return image
+
+def render(frame, canvas, toolbar):
+    global overlay, canvas_dirty, render_ms
+    start = time.perf_counter()
+    if overlay is None or overlay.shape != frame.shape:
+        overlay = np.empty_like(frame)
+    th, tw = toolbar.shape[:2]
+
+    cv2.addWeighted(frame[th:], 0.5, canvas[th:], 0.5, 0, dst=overlay[th:])
+    overlay[:th, :tw] = toolbar
+    if tw < frame.shape[1]:
+        # The few columns right of the last button
+        overlay[:th, tw:] = cv2.addWeighted(frame[:th, tw:], 0.5, canvas[:th, tw:], 0.5, 0)
+
+    cv2.putText(overlay, f"render {render_ms:.1f} ms  latency {pipeline.latency.ms:.0f} ms",
+                (10, frame.shape[0] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255,255,255), 1)
+    cv2.imshow("Air Drawing", overlay)
+    if canvas_dirty:
+        cv2.imshow("Canvas", canvas)
+        canvas_dirty = False
+    # Smoothed per-frame render time, shown on the next frame
+    render_ms += 0.1 * ((time.perf_counter() - start) * 1000 - render_ms)
+
+# --- Game Loop ---
+# Capture and hand tracking run on their own threads (see common/pipeline.py);
+# the drawing state is only touched here, on the main thread.
+def infer(captured):
+    return hands.process(cv2.cvtColor(captured.image, cv2.COLOR_BGR2RGB))
+
+def update(captured, results):
+    global canvas, canvas_dirty, current_stroke, prev_x, prev_y, drawing, selected_color, selected_brush
+    # The pipeline has already mirrored the frame
+    frame = captured.image
     h, w, _ = frame.shape
-    if canvas.shape[:2] != (h, w):
+    if canvas is None or canvas.shape[:2] != (h, w):
+        first = canvas is None
         canvas = np.ones((h, w, 3), dtype="uint8") * 255
-
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = hands.process(rgb)
+        canvas_dirty = True
+        if first:
+            open_drawing(canvas)
 
     if results.multi_hand_landmarks:
-        lm = results.multi_hand_landmarks[0].landmark
-        x1, y1 = int(lm[8].x * w), int(lm[8].y * h)
-        x2, y2 = int(lm[12].x * w), int(lm[12].y * h)
-
-        fingers = [lm[i].y < lm[i-2].y for i in [8,12,16,20]]
-        thumb = lm[4].x > lm[3].x
-        if all(fingers) and thumb:
-            canvas[:] = 255
-            prev_x, prev_y = 0,0
-            drawing = False
+        lm = landmark_filter(landmark_array(results.multi_hand_landmarks[0]), captured.captured_at)
+        x1, y1 = int(lm[8][0] * w), int(lm[8][1] * h)
+        gestures.update(lm, captured.captured_at)
 
         toolbar_height = int(h * 0.08)
         total_buttons = len(colors) + len(brush_sizes) + len(extra_buttons)
@@ -93,33 +192,48 @@ while True:
             elif btn_idx < len(colors) + len(brush_sizes):
                 selected_brush = brush_sizes[btn_idx - len(colors)]
             elif btn_idx == len(colors) + len(brush_sizes):
-                cv2.imwrite("drawing.png", canvas)
+                # A few KB of vector strokes, opened again on the next run
+                end_stroke()
+                with open(DRAWING_PATH, "wb") as f:
+                    f.write(encode_strokes(strokes, w, h))
             elif btn_idx == len(colors) + len(brush_sizes) + 1:
                 canvas[:] = 255
+                canvas_dirty = True
+                strokes.clear()
+                current_stroke = None
+            end_stroke()
             prev_x, prev_y = 0,0
 
-        elif lm[8].y < lm[6].y and not (lm[12].y < lm[10].y):
+        elif gestures.is_active(POINTING):
             if prev_x == 0 and prev_y == 0:
                 prev_x, prev_y = x1, y1
             cv2.line(canvas, (prev_x, prev_y), (x1, y1), selected_color, selected_brush)
+            canvas_dirty = True
+            continue_stroke(selected_color, selected_brush, x1, y1)
             prev_x, prev_y = x1, y1
             drawing = True
 
-        elif lm[8].y < lm[6].y and lm[12].y < lm[10].y:
-            cv2.circle(canvas, (x1, y1), 30, (255,255,255), -1)
+        elif gestures.is_active(TWO_FINGERS):
+            cv2.circle(canvas, (x1, y1), ERASER_SIZE // 2, ERASER_COLOR, -1)
+            canvas_dirty = True
+            continue_stroke(ERASER_COLOR, ERASER_SIZE, x1, y1)
             prev_x, prev_y = 0, 0
             drawing = False
         else:
+            end_stroke()
             prev_x, prev_y = 0, 0
             drawing = False
+    else:
+        end_stroke()
+        landmark_filter.reset()
+        gestures.update(None, captured.captured_at)
 
-    overlay = cv2.addWeighted(frame, 0.5, canvas, 0.5, 0)
-    draw_toolbar(overlay, colors.index(selected_color), brush_sizes.index(selected_brush))
-    cv2.imshow("Air Drawing", overlay)
-    cv2.imshow("Canvas", canvas)
+    toolbar = toolbar_image(w, int(h * 0.08), colors.index(selected_color), brush_sizes.index(selected_brush))
+    render(frame, canvas, toolbar)
+
+    return cv2.waitKey(1) & 0xFF != 27
 
-    if cv2.waitKey(1) & 0xFF == 27:
-        break
+pipeline = Pipeline(infer, update, **camera_settings())
+pipeline.run()
 
-cap.release()
 cv2.destroyAllWindows()
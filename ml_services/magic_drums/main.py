@@ -1,72 +1,83 @@
+import os
+import sys
 import cv2
 import mediapipe as mp
-import pygame
 import time
 import numpy as np
-import random
 
-# --- Initialization ---
-pygame.mixer.init()
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.audio import SoundBoard
+from common.drums import FAILURE, ROUND, SUCCESS, DrumEngine, load_layout
+from common.filters import OneEuroFilter, landmark_array
+from common.pipeline import Pipeline, camera_settings
 
 # --- Load Sounds ---
-# Make sure you have these sound files in a 'sounds' folder
-sounds = {
-    'crash': pygame.mixer.Sound('sounds/crash.mp3'),
-    'hi_hat': pygame.mixer.Sound('sounds/hi_hat.mp3'),
-    'kick-drum': pygame.mixer.Sound('sounds/kick-drum.mp3'),
-    'snare-drum': pygame.mixer.Sound('sounds/snare-drum.mp3'),
+# Make sure you have these sound files in a 'sounds' folder. They are decoded
+# once here and played from their own thread (see common/audio.py).
+sounds = SoundBoard({
+    'crash': 'sounds/crash.mp3',
+    'hi_hat': 'sounds/hi_hat.mp3',
+    'kick-drum': 'sounds/kick-drum.mp3',
+    'snare-drum': 'sounds/snare-drum.mp3',
     # You can find simple .wav files online for success/failure sounds
-    'success': pygame.mixer.Sound('sounds/success.mp3'),
-    'failure': pygame.mixer.Sound('sounds/failure.mp3')
-}
+    'success': 'sounds/success.mp3',
+    'failure': 'sounds/failure.mp3'
+})
 
-# --- Define Drum Zones ---
-drum_zones = {
-    (0.7, 0.1, 0.9, 0.4): {'name': 'crash', 'color': (0, 255, 0), 'last_hit': 0},
-    (0.1, 0.1, 0.3, 0.4): {'name': 'hi_hat', 'color': (255, 0, 0), 'last_hit': 0},
-    (0.1, 0.6, 0.3, 0.9): {'name': 'kick-drum', 'color': (0, 0, 255), 'last_hit': 0},
-    (0.7, 0.6, 0.9, 0.9): {'name': 'snare-drum', 'color': (255, 255, 0), 'last_hit': 0}
-}
+# --- Drum Zones and Game State ---
+# Zones come from magic_drums/layouts/<DRUM_LAYOUT>.json; scoring lives in
+# common/drums.py so the same game can run in the tracking service.
+engine = DrumEngine(load_layout(os.getenv("DRUM_LAYOUT", "default")))
+layout = engine.layout
+zone_colors = layout.bgr_colors
 
-HIT_COOLDOWN = 1.50 # A half-second delay between hits
+# Smooths fingertip jitter so a hand resting on a zone edge doesn't flicker in and out.
+# One filter per tracked hand (MediaPipe tracks up to two by default).
+landmark_filters = [OneEuroFilter(), OneEuroFilter()]
 
 # --- Initialize MediaPipe ---
 mp_hands = mp.solutions.hands
 hands = mp_hands.Hands(min_detection_confidence=0.7, min_tracking_confidence=0.7)
 mp_drawing = mp.solutions.drawing_utils
 
-# --- Game Sequence Logic Variables ---
-sequence = ['hi_hat', 'snare-drum', 'kick-drum', 'crash']
-random.shuffle(sequence)
-current_step_in_sequence = 0
-
-# --- Start Webcam Capture ---
-cap = cv2.VideoCapture(0)
-
-while cap.isOpened():
-    success, frame = cap.read()
-    if not success:
-        continue
-
-    # Flip the frame and get dimensions
-    frame = cv2.flip(frame, 1)
+# --- Game Loop ---
+# The camera, MediaPipe and the window each run at their own pace (see
+# common/pipeline.py); game state is only touched from render().
+def infer(captured):
+    return hands.process(cv2.cvtColor(captured.image, cv2.COLOR_BGR2RGB))
+
+def play(event, captured_at):
+    # Timed from the camera frame the hit was seen in, so the sound board's
+    # latency covers capture, tracking and scoring too
+    if event.kind == SUCCESS:
+        print(f"Correct! Hit {event.drum}")
+        sounds.trigger(event.drum, at=captured_at)
+        sounds.trigger('success', at=captured_at)
+    elif event.kind == FAILURE:
+        print(f"Wrong! You hit {event.drum}. Resetting.")
+        sounds.trigger('failure', at=captured_at)
+    elif event.kind == ROUND:
+        print("Sequence Complete! Starting new round.")
+
+def render(captured, results):
+    # The pipeline has already mirrored the frame
+    frame = captured.image
     h, w, _ = frame.shape
     
     # Create a transparent overlay for the glowing effect
     overlay = frame.copy()
     
     # --- Drawing Logic with Continuous Highlighting ---
-    drum_to_hit = sequence[current_step_in_sequence]
+    drum_to_hit = engine.target
 
-    for zone, data in drum_zones.items():
-        x1_norm, y1_norm, x2_norm, y2_norm = zone
+    for name, (x1_norm, y1_norm, x2_norm, y2_norm), color in zip(layout.names, layout.boxes, zone_colors):
         start_point = (int(x1_norm * w), int(y1_norm * h))
         end_point = (int(x2_norm * w), int(y2_norm * h))
         
         # Highlight the next drum in the sequence
-        if data['name'] == drum_to_hit:
+        if name == drum_to_hit:
             # Draw a filled rectangle on the overlay for the glow effect
-            cv2.rectangle(overlay, start_point, end_point, data['color'], -1)
+            cv2.rectangle(overlay, start_point, end_point, color, -1)
             
             # Blend the overlay with the original frame
             alpha = 0.4 # Transparency factor
@@ -76,53 +87,31 @@ while cap.isOpened():
             cv2.putText(frame, "HIT THIS!", (start_point[0], end_point[1] + 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 3)
 
         # Draw the outer box and text
-        cv2.rectangle(frame, start_point, end_point, data['color'], 2)
-        cv2.putText(frame, data['name'], (start_point[0], start_point[1]-10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, data['color'], 2)
-
-    # --- Hand Tracking and Hit Detection ---
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = hands.process(rgb_frame)
-
-    if results.multi_hand_landmarks:
-        for hand_landmarks in results.multi_hand_landmarks:
-            mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-            
-            landmarks_to_check = [mp_hands.HandLandmark.INDEX_FINGER_TIP, mp_hands.HandLandmark.MIDDLE_FINGER_TIP]
-            current_time = time.time()
-
-            for landmark_index in landmarks_to_check:
-                landmark = hand_landmarks.landmark[landmark_index]
-                
-                for zone, data in drum_zones.items():
-                    x1_norm, y1_norm, x2_norm, y2_norm = zone
-                    
-                    if x1_norm < landmark.x < x2_norm and y1_norm < landmark.y < y2_norm:
-                        if current_time - data['last_hit'] > HIT_COOLDOWN:
-                            data['last_hit'] = current_time
-                            
-                            # Check if the correct drum was hit
-                            if data['name'] == drum_to_hit:
-                                print(f"Correct! Hit {drum_to_hit}")
-                                sounds[data['name']].play()
-                                sounds['success'].play()
-                                current_step_in_sequence += 1
-                                
-                                # Check if sequence is complete
-                                if current_step_in_sequence >= len(sequence):
-                                    print("Sequence Complete! Starting new round.")
-                                    current_step_in_sequence = 0
-                                    random.shuffle(sequence) # Create a new sequence
-                            else:
-                                print(f"Wrong! You hit {data['name']}, but needed {drum_to_hit}. Resetting.")
-                                sounds['failure'].play()
-                                current_step_in_sequence = 0 # Reset on wrong hit
-                            break 
+        cv2.rectangle(frame, start_point, end_point, color, 2)
+        cv2.putText(frame, name, (start_point[0], start_point[1]-10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
+
+    # --- Hit Detection ---
+    tracked = results.multi_hand_landmarks or []
+    for hand_landmarks in tracked:
+        mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
+    if tracked:
+        smoothed = np.stack([landmark_filters[i](landmark_array(hand_landmarks), captured.captured_at)
+                             for i, hand_landmarks in enumerate(tracked)])
+        for event in engine.update(smoothed, time.time()):
+            play(event, captured.captured_at)
+
+    # Forget the smoothing state of any hand that is no longer tracked
+    for landmark_filter in landmark_filters[len(tracked):]:
+        landmark_filter.reset()
 
     # --- Display the Frame ---
+    cv2.putText(frame, f"latency {pipeline.latency.ms:.0f} ms", (10, h - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
     cv2.imshow('Magic Drums', frame)
-    if cv2.waitKey(5) & 0xFF == ord('q'):
-        break
+    return cv2.waitKey(1) & 0xFF != ord('q')
+
+pipeline = Pipeline(infer, render, **camera_settings())
+pipeline.run()
 
 # --- Cleanup ---
-cap.release()
-cv2.destroyAllWindows()
\ No newline at end of file
+sounds.close()
+cv2.destroyAllWindows()
@@ -0,0 +1,61 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.drums import FAILURE, HIT, SUCCESS, DrumEngine, load_layout, replay
+
+# Index and middle fingertips only, as recorded with ?landmarks=8,12&fields=xy.
+# The sequence starts with the snare: the index finger hits it (success),
+# rests on it (cooldown, no event), hits the crash instead (failure), and the
+# middle finger hits the snare again once its cooldown has run out.
+TRACE = Path(__file__).parent / "fixtures" / "drums_trace.json"
+
+
+def load_trace():
+    trace = json.loads(TRACE.read_text())
+    return trace["t"], np.array(trace["values"], dtype=np.float32), trace["landmarks"], trace["fields"]
+
+
+def engine():
+    engine = DrumEngine(load_layout())
+    engine.sequence = ["snare-drum", "hi_hat", "crash", "kick-drum"]
+    engine.step = 0
+    return engine
+
+
+def test_replay_scores_hits_and_misses():
+    times, frames, landmarks, fields = load_trace()
+    events = replay(engine(), times, frames, landmarks, fields)
+    assert [(e.kind, e.drum, e.t) for e in events] == [
+        (HIT, "snare-drum", 0.1), (SUCCESS, "snare-drum", 0.1),
+        (HIT, "crash", 0.4), (FAILURE, "crash", 0.4),
+        (HIT, "snare-drum", 2.0), (SUCCESS, "snare-drum", 2.0),
+    ]
+
+
+def test_replay_matches_full_recordings_by_position():
+    times, frames, landmarks, fields = load_trace()
+    full = np.full((len(frames), 21, 3), np.nan, dtype=np.float32)
+    full[:, landmarks, :2] = frames
+    subset = replay(engine(), times, frames, landmarks, fields)
+    assert replay(engine(), times, full) == subset
+
+
+def test_replay_rejects_recordings_without_the_fingertips():
+    times, frames, landmarks, fields = load_trace()
+    with pytest.raises(ValueError, match=r"no landmarks \[12\]"):
+        replay(engine(), times, frames[:, :1], landmarks[:1], fields)
+
+
+def test_default_layout_draws_the_original_zone_colours():
+    # BGR, as the desktop game drew them before layouts were files
+    layout = load_layout()
+    assert dict(zip(layout.names, layout.bgr_colors)) == {
+        "crash": (0, 255, 0), "hi_hat": (255, 0, 0),
+        "kick-drum": (0, 0, 255), "snare-drum": (255, 255, 0),
+    }